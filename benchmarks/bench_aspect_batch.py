@@ -0,0 +1,77 @@
+import sys
+import time
+from pathlib import Path
+src_dir = (Path(__file__).resolve().parent.parent / 'src').resolve()
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+import numpy as np
+
+from aspect_logic import calculate_new_dimensions, format_ratio, simplify_aspect_ratio
+from aspect_batch import simplify_aspect_ratio_batch, calculate_new_dimensions_batch, format_ratio_batch
+
+
+def _make_inputs(rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    widths = rng.integers(1, 8192, rows).astype(np.float64)
+    heights = rng.integers(1, 8192, rows).astype(np.float64)
+    widths[::97] = 0.0
+    heights[::89] = -1.0
+    widths[::101] = 0.004
+    target_w = np.where(rng.random(rows) < 0.5, rng.integers(1, 4096, rows), np.nan)
+    return widths, heights, target_w
+
+
+def _scalar_loop(widths, heights, target_w):
+    ratios = []
+    dims = []
+    for w, h, tw in zip(widths.tolist(), heights.tolist(), target_w.tolist()):
+        ratio = simplify_aspect_ratio(w, h)
+        ratios.append(ratio)
+        dims.append(calculate_new_dimensions(ratio, None if tw != tw else tw, None, w, h))
+    return ratios, dims
+
+
+def _batch(widths, heights, target_w):
+    num, den = simplify_aspect_ratio_batch(widths, heights)
+    new_w, new_h = calculate_new_dimensions_batch(num, den, target_w, None, widths, heights)
+    return num, den, new_w, new_h
+
+
+def _same(a, b) -> bool:
+    if a is None:
+        return b != b
+    return a == b or (a != a and b != b)
+
+
+def check_equivalence(rows: int = 100_000):
+    widths, heights, target_w = _make_inputs(rows, seed=1)
+    ratios, dims = _scalar_loop(widths, heights, target_w)
+    num, den, new_w, new_h = _batch(widths, heights, target_w)
+
+    assert format_ratio_batch(num, den) == [format_ratio(ratio) for ratio in ratios]
+    for (w, h), bw, bh in zip(dims, new_w.tolist(), new_h.tolist()):
+        assert _same(w, bw) and _same(h, bh), ((w, h), (bw, bh))
+
+
+def main(rows: int = 1_000_000):
+    check_equivalence()
+
+    widths, heights, target_w = _make_inputs(rows)
+
+    start = time.perf_counter()
+    _scalar_loop(widths, heights, target_w)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _batch(widths, heights, target_w)
+    batch_time = time.perf_counter() - start
+
+    print(f"rows:         {rows:,}")
+    print(f"python loop:  {loop_time:.3f} s")
+    print(f"numpy batch:  {batch_time:.3f} s")
+    print(f"speedup:      {loop_time / batch_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
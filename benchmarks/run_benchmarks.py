@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+repo_dir = Path(__file__).resolve().parent.parent
+src_dir = (repo_dir / 'src').resolve()
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+from aspect_logic import simplify_aspect_ratio, calculate_new_dimensions, get_image_dimensions
+
+FIXTURE_DIR = repo_dir / 'benchmarks' / 'fixtures'
+IMAGE_SIZES = {
+    "tiny": (16, 16),
+    "hd": (1920, 1080),
+    "48mp": (8000, 6000),
+    "108mp": (12000, 9000),
+}
+IMAGE_FORMATS = {
+    "png": ("PNG", "L"),
+    "jpeg": ("JPEG", "L"),
+    "gif": ("GIF", "L"),
+    "bmp": ("BMP", "L"),
+    "webp": ("WEBP", "L"),
+}
+DEFAULT_THRESHOLD = 0.25
+
+
+def measure(func, inner: int = 1, repeat: int = 5, min_time: float = 0.05) -> dict:
+    func()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - start >= min_time or loops >= 1_000_000:
+            break
+        loops *= 2
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - start) / (loops * inner))
+
+    return {
+        "seconds_per_op": statistics.median(samples),
+        "min_seconds_per_op": min(samples),
+        "ops": loops * inner * repeat,
+    }
+
+
+def bench_aspect_logic(rows: int) -> dict:
+    rng = random.Random(0)
+    pairs = [(float(rng.randint(1, 8192)), float(rng.randint(1, 8192))) for _ in range(rows)]
+    ratios = [simplify_aspect_ratio(w, h) for w, h in pairs]
+
+    def run_simplify():
+        for w, h in pairs:
+            simplify_aspect_ratio(w, h)
+
+    def run_dimensions():
+        for ratio, (w, h) in zip(ratios, pairs):
+            calculate_new_dimensions(ratio, 1920.0, None, w, h)
+
+    results = {
+        "aspect_logic.simplify_aspect_ratio": measure(run_simplify, inner=rows, repeat=3),
+        "aspect_logic.calculate_new_dimensions": measure(run_dimensions, inner=rows, repeat=3),
+    }
+
+    try:
+        import numpy as np
+        from aspect_batch import simplify_aspect_ratio_batch, calculate_new_dimensions_batch
+    except ImportError:
+        return results
+
+    widths = np.array([w for w, _ in pairs])
+    heights = np.array([h for _, h in pairs])
+    num, den = simplify_aspect_ratio_batch(widths, heights)
+    results["aspect_batch.simplify_aspect_ratio_batch"] = measure(
+        lambda: simplify_aspect_ratio_batch(widths, heights), inner=rows, repeat=3)
+    results["aspect_batch.calculate_new_dimensions_batch"] = measure(
+        lambda: calculate_new_dimensions_batch(num, den, 1920.0, None, widths, heights), inner=rows, repeat=3)
+    return results
+
+
+def ensure_image_fixtures(sizes: dict) -> dict:
+    from PIL import Image
+
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    fixtures = {}
+    for size_name, size in sizes.items():
+        image = None
+        for ext, (fmt, mode) in IMAGE_FORMATS.items():
+            if fmt == "WEBP" and max(size) > 16383:
+                continue
+            path = FIXTURE_DIR / f"{size_name}.{ext}"
+            if not path.exists():
+                if image is None:
+                    image = Image.linear_gradient("L").resize(size).convert(mode)
+                print(f"generating {path.name} ...", file=sys.stderr)
+                image.save(path, fmt)
+            fixtures[f"{ext}/{size_name}"] = str(path)
+    return fixtures
+
+
+def bench_image_probe(sizes: dict) -> dict:
+    try:
+        fixtures = ensure_image_fixtures(sizes)
+    except ImportError:
+        print("Pillow が見つからないため画像のベンチマークをスキップします。", file=sys.stderr)
+        return {}
+
+    return {
+        f"get_image_dimensions.{name}": measure(lambda path=path: get_image_dimensions(path))
+        for name, path in fixtures.items()
+    }
+
+
+def bench_localization(bundle_file_path: str) -> dict:
+    from localization_manager import LocalizationManager
+
+    lang_folder = str(repo_dir / 'language')
+
+    def construct():
+        manager = LocalizationManager(lang_folder=lang_folder, bundle_file_path=bundle_file_path)
+        manager.get_available_languages()
+
+    return {
+        "LocalizationManager.construct_all_languages": measure(construct, repeat=5),
+    }
+
+
+class _StubEntry:
+
+    def __init__(self, value: str = ""):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def config(self, **kwargs):
+        pass
+
+    def delete(self, first, last=None):
+        self.value = ""
+
+    def insert(self, index, value):
+        self.value = value
+
+
+def bench_gui_logic() -> dict:
+    from gui_logic import GuiLogic, ORIGINAL_OUTPUT_KEYS, FINAL_OUTPUT_KEYS
+
+    entries = {
+        "original_w": _StubEntry("1366"),
+        "original_h": _StubEntry("768"),
+        "target_ratio_w": _StubEntry("16"),
+        "target_ratio_h": _StubEntry("9"),
+        "target_w": _StubEntry("1920"),
+        "target_h": _StubEntry(""),
+    }
+    output_entries = {key: _StubEntry() for key in ORIGINAL_OUTPUT_KEYS + FINAL_OUTPUT_KEYS}
+    logic = GuiLogic(None, entries, {}, output_entries, {}, {}, None)
+    values = ["1366", "1920", "1280", "3840"]
+    counter = [0]
+
+    def calculate():
+        counter[0] += 1
+        entries["original_w"].value = values[counter[0] % len(values)]
+        logic.calculate_aspects()
+
+    return {
+        "GuiLogic.calculate_aspects": measure(calculate),
+    }
+
+
+def compare_with_baseline(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        change = result["seconds_per_op"] / previous["seconds_per_op"] - 1
+        result["change_vs_baseline"] = change
+        if change > threshold:
+            regressions.append(f"{name}: {change * 100:+.1f}% (threshold {threshold * 100:.0f}%)")
+    return regressions
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for the Aspect Ratio Calculator.")
+    parser.add_argument("--output", help="write results as JSON to this file (default: stdout)")
+    parser.add_argument("--baseline", help="compare against a JSON file written by a previous run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown vs. baseline before failing (default: 0.25 = 25%%)")
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic rows for aspect_logic benchmarks")
+    parser.add_argument("--quick", action="store_true", help="skip the 48 MP and 108 MP image fixtures")
+    args = parser.parse_args(argv)
+
+    sizes = {name: size for name, size in IMAGE_SIZES.items()
+             if not args.quick or size[0] * size[1] < 10_000_000}
+
+    import language_bundle
+
+    working_dir = os.getcwd()
+    os.chdir(repo_dir)
+    # 言語バンドルのキャッシュをリポジトリの user/ に残さないよう、一時フォルダに書き出す
+    with tempfile.TemporaryDirectory(prefix='aspect-bench-') as temp_dir:
+        bundle_file_path = os.path.join(temp_dir, 'language_bundle.pickle')
+        default_bundle_file = language_bundle.BUNDLE_FILE
+        language_bundle.BUNDLE_FILE = bundle_file_path
+        try:
+            results = {}
+            results.update(bench_aspect_logic(args.rows))
+            results.update(bench_image_probe(sizes))
+            results.update(bench_localization(bundle_file_path))
+            results.update(bench_gui_logic())
+        finally:
+            language_bundle.BUNDLE_FILE = default_bundle_file
+            os.chdir(working_dir)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_with_baseline(results, json.load(f), args.threshold)
+
+    text = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
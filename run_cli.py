@@ -0,0 +1,14 @@
+import sys
+from pathlib import Path
+current_file_path = Path(__file__).resolve()
+src_dir = (current_file_path.parent / 'src').resolve()
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+
+if __name__ == "__main__":
+    if getattr(sys, 'frozen', False):
+        from multiprocessing import freeze_support
+        freeze_support()
+    from aspect_cli import main
+    sys.exit(main())
@@ -1,16 +1,38 @@
 import sys
+import time
 from pathlib import Path
+launch_time = time.perf_counter()
 current_file_path = Path(__file__).resolve()
 src_dir = (current_file_path.parent / 'src').resolve()
 if str(src_dir) not in sys.path:
     sys.path.insert(0, str(src_dir))
 
 
-def main():
-    app = AspectRatioCalculator()
+def main(paths: list[str] = None):
+    app = AspectRatioCalculator(paths)
     app.mainloop()
 
 
 if __name__ == "__main__":
+    from startup_profiler import profiler
+    args = sys.argv[1:]
+    if "--profile-startup" in args:
+        profiler.enable(launch_time)
+    paths = [arg for arg in args if not arg.startswith("--")]
+
+    if "--new-instance" not in args:
+        from settings_manager import get_settings_store
+        if get_settings_store().get("single_instance", False):
+            from single_instance import forward_to_running_instance
+            if forward_to_running_instance(paths):
+                profiler.mark("forwarded")
+                profiler.report()
+                sys.exit(0)
+
+    from localization_manager import get_i18n
+    get_i18n()
+    profiler.mark("localization")
+
     from src.aspect_calculator_gui import AspectRatioCalculator
-    main()
+    profiler.mark("imports")
+    main(paths)
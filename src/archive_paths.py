@@ -0,0 +1,5 @@
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+def is_archive_path(path: str) -> bool:
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
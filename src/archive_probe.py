@@ -0,0 +1,69 @@
+import tarfile
+import zipfile
+from typing import Iterator, NamedTuple
+
+from aspect_logic import IMAGE_EXTENSIONS
+from image_probe import probe_stream
+
+
+class ArchiveMember(NamedTuple):
+    member: str
+    width: int
+    height: int
+
+
+class _ForwardReader:
+
+    def __init__(self, f):
+        self.f = f
+
+    def read(self, size: int = -1) -> bytes:
+        return self.f.read(size)
+
+    def seek(self, offset: int, whence: int = 0):
+        if whence != 1 or offset < 0:
+            raise OSError("only forward relative seeks are supported")
+        while offset > 0:
+            chunk = self.f.read(min(offset, 65536))
+            if not chunk:
+                break
+            offset -= len(chunk)
+
+
+def _probe_member(f) -> tuple[int, int]:
+    try:
+        size = probe_stream(f)
+    except (OSError, EOFError, tarfile.TarError, zipfile.BadZipFile):
+        size = None
+    return size if size is not None else (None, None)
+
+
+def _iter_zip(path: str) -> Iterator[ArchiveMember]:
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            with zf.open(info) as f:
+                yield ArchiveMember(info.filename, *_probe_member(f))
+
+
+def _iter_tar(path: str) -> Iterator[ArchiveMember]:
+    streaming = not path.lower().endswith(".tar")
+    with tarfile.open(path, 'r|*' if streaming else 'r:') as tf:
+        for member in tf:
+            if not member.isfile() or not member.name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            f = tf.extractfile(member)
+            if f is None:
+                continue
+            with f:
+                yield ArchiveMember(member.name, *_probe_member(_ForwardReader(f) if streaming else f))
+
+
+def probe_archive(path: str) -> Iterator[ArchiveMember]:
+    if zipfile.is_zipfile(path):
+        yield from _iter_zip(path)
+    elif tarfile.is_tarfile(path):
+        yield from _iter_tar(path)
+    else:
+        raise ValueError(f"unsupported archive: {path}")
@@ -0,0 +1,110 @@
+import numpy as np
+
+from aspect_logic import format_ratio_part
+from ratio_engine import DEFAULT_TOLERANCE, STANDARD_VALUES
+
+_STANDARD_VALUES = np.asarray(STANDARD_VALUES)
+
+
+def _as_float_array(values) -> np.ndarray:
+    if values is None:
+        return None
+    return np.asarray(values, dtype=np.float64)
+
+
+def simplify_aspect_ratio_batch(widths, heights) -> tuple[np.ndarray, np.ndarray]:
+    # simplify_aspect_ratio と同じ結果を配列で返す。
+    # None (N/A) の行は NaN、100 倍して 0 になる極小値の行は元の値をそのまま返す。
+    w = _as_float_array(widths)
+    h = _as_float_array(heights)
+    w, h = np.broadcast_arrays(w, h)
+
+    valid = (w > 0) & (h > 0)
+    safe_w = np.where(valid, w, 0.0)
+    safe_h = np.where(valid, h, 0.0)
+
+    w_int = np.rint(safe_w * 100).astype(np.int64)
+    h_int = np.rint(safe_h * 100).astype(np.int64)
+    underflow = valid & ((w_int == 0) | (h_int == 0))
+
+    common_divisor = np.gcd(w_int, h_int)
+    common_divisor[common_divisor == 0] = 1
+
+    num = (w_int // common_divisor).astype(np.float64)
+    den = (h_int // common_divisor).astype(np.float64)
+
+    num[underflow] = w[underflow]
+    den[underflow] = h[underflow]
+    num[~valid] = np.nan
+    den[~valid] = np.nan
+    return num, den
+
+
+def format_ratio_batch(num, den) -> list[str]:
+    ratios = []
+    for n, d in zip(np.asarray(num).tolist(), np.asarray(den).tolist()):
+        if n != n or d != d:
+            ratios.append("N/A")
+        else:
+            ratios.append(f"{format_ratio_part(n)}:{format_ratio_part(d)}")
+    return ratios
+
+
+def calculate_new_dimensions_batch(ratio_w, ratio_h, target_w=None, target_h=None,
+                                   fallback_w=None, fallback_h=None) -> tuple[np.ndarray, np.ndarray]:
+    # calculate_new_dimensions と同じ優先順位 (target_w → target_h → fallback_w → fallback_h) で計算する。
+    # 値が無いこと (None) は NaN で表す。比率が不正な行は fallback をそのまま返す。
+    rw = _as_float_array(ratio_w)
+    rh = _as_float_array(ratio_h)
+    rw, rh = np.broadcast_arrays(rw, rh)
+    shape = rw.shape
+
+    def column(values):
+        if values is None:
+            return np.full(shape, np.nan)
+        return np.broadcast_to(_as_float_array(values), shape)
+
+    tw = column(target_w)
+    th = column(target_h)
+    fw = column(fallback_w)
+    fh = column(fallback_h)
+
+    valid_ratio = (rw > 0) & (rh > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        from_tw = (tw / rw) * rh
+        from_th = (th / rh) * rw
+        from_fw = (fw / rw) * rh
+        from_fh = (fh / rh) * rw
+
+    has_tw = ~np.isnan(tw)
+    has_th = ~np.isnan(th)
+    has_fw = ~np.isnan(fw)
+    has_fh = ~np.isnan(fh)
+
+    new_w = np.select([has_tw, has_th, has_fw, has_fh], [tw, from_th, fw, from_fh], np.nan)
+    new_h = np.select([has_tw, has_th, has_fw, has_fh], [from_tw, th, from_fw, fh], np.nan)
+
+    new_w = np.where(valid_ratio, new_w, fw)
+    new_h = np.where(valid_ratio, new_h, fh)
+    return new_w, new_h
+
+
+def nearest_standard_ratio_batch(widths, heights, tolerance: float = DEFAULT_TOLERANCE) -> np.ndarray:
+    # ratio_engine.STANDARD_LABELS へのインデックスを返す。許容誤差を超える行と "N/A" の行は -1。
+    w = _as_float_array(widths)
+    h = _as_float_array(heights)
+    w, h = np.broadcast_arrays(w, h)
+    valid = (w > 0) & (h > 0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        values = np.where(valid, w / h, np.nan)
+
+    index = np.searchsorted(_STANDARD_VALUES, values)
+    lower = np.clip(index - 1, 0, len(_STANDARD_VALUES) - 1)
+    upper = np.clip(index, 0, len(_STANDARD_VALUES) - 1)
+    lower_error = np.abs(values - _STANDARD_VALUES[lower]) / _STANDARD_VALUES[lower]
+    upper_error = np.abs(values - _STANDARD_VALUES[upper]) / _STANDARD_VALUES[upper]
+
+    nearest = np.where(upper_error < lower_error, upper, lower)
+    error = np.minimum(lower_error, upper_error)
+    return np.where(valid & (error <= tolerance), nearest, -1)
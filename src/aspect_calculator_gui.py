@@ -1,17 +1,27 @@
+import os
+import queue
 import tkinter as tk
 from tkinter import ttk, filedialog
 from tkinterdnd2 import DND_FILES, TkinterDnD
-from settings_manager import SettingsManager
-from localization_manager import i18n
-from gui_logic import GuiLogic
+from settings_manager import SettingsManager, get_settings_store
+from localization_manager import get_i18n
+from gui_logic import FIT_MODE_RATIO, FIT_MODES, GuiLogic
+from aspect_logic import IMAGE_EXTENSIONS
+from archive_paths import ARCHIVE_EXTENSIONS
+from video_probe import VIDEO_EXTENSIONS
+from startup_profiler import profiler
+import metrics
+
+INSTANCE_POLL_MS = 50
 
 
 class AspectRatioCalculator(TkinterDnD.Tk):
 
-    def __init__(self):
+    def __init__(self, initial_paths: list[str] = None):
         super().__init__()
+        profiler.mark("tk_init")
 
-        self.i18n = i18n
+        self.i18n = get_i18n()
         self.entries = {}
         self.input_vars = {}
         self.output_entries = {}
@@ -20,14 +30,24 @@ class AspectRatioCalculator(TkinterDnD.Tk):
         self.settings = {}
         self.previous_inputs = {}
         self.settings_window = None
+        self.initial_paths = initial_paths or []
+        self.instance_server = None
+        self._instance_requests = queue.Queue()
 
         self._load_settings()
+        profiler.mark("settings")
 
         self.auto_calculate_image_var = tk.BooleanVar(value=self.settings.get("auto_calculate_image", True))
+        self.live_calculate_var = tk.BooleanVar(value=self.settings.get("live_calculate", False))
+        self.watch_folder_var = tk.BooleanVar(value=self.settings.get("watch_folder", False))
+        self.single_instance_var = tk.BooleanVar(value=self.settings.get("single_instance", False))
+        fit_mode = self.settings.get("fit_mode", FIT_MODE_RATIO)
+        self.fit_mode_var = tk.StringVar(value=fit_mode if fit_mode in FIT_MODES else FIT_MODE_RATIO)
 
         self.logic = GuiLogic(
             self, self.entries, self.input_vars, self.output_entries,
-            self.settings, self.previous_inputs, self.auto_calculate_image_var
+            self.settings, self.previous_inputs, self.auto_calculate_image_var,
+            self.live_calculate_var, self.watch_folder_var, self.fit_mode_var
         )
 
         self._set_geometry_and_title()
@@ -36,13 +56,38 @@ class AspectRatioCalculator(TkinterDnD.Tk):
 
         self._create_widgets()
         self._setup_context_menu()
+        profiler.mark("create_widgets")
 
         self.protocol("WM_DELETE_WINDOW", self._on_closing)
+        self.bind("<Escape>", lambda event: self.logic.cancel_image_probe())
+        if metrics.enabled:
+            self.bind("<Control-Shift-M>", lambda event: metrics.dump())
+        self.after_idle(self._on_first_frame)
+
+    def _on_first_frame(self):
+        profiler.mark("first_frame")
+        self.after(1, self._populate_language_menu)
+        self._update_instance_server()
+        if self.initial_paths:
+            self.open_paths(self.initial_paths)
+        else:
+            self.logic.update_folder_watch()
+
+    def _populate_language_menu(self):
+        lang_choices = self.i18n.get_available_languages()
+        menu = self.lang_menu["menu"]
+        menu.delete(0, tk.END)
+        for name in lang_choices:
+            menu.add_command(label=name,
+                             command=tk._setit(self.lang_var, name,
+                                               lambda choice: self._change_language(lang_choices[choice])))
+        profiler.mark("language_menu (deferred)")
+        profiler.report()
 
     def _set_geometry_and_title(self):
         self.title(self.i18n.get_string("title"))
 
-        geometry_str = self.settings.get("geometry", "450x690+100+100")
+        geometry_str = self.settings.get("geometry", "450x720+100+100")
 
         try:
             parts = geometry_str.split('+')
@@ -61,10 +106,13 @@ class AspectRatioCalculator(TkinterDnD.Tk):
             self.geometry(f"{w}x{h}+{new_x}+{new_y}")
 
         except Exception:
-            self.geometry("450x690+100+100")
+            self.geometry("450x720+100+100")
 
     def _on_closing(self):
-        self.logic._save_settings(self.geometry(), self.i18n.current_code)
+        self.logic.cancel_image_probe()
+        self.logic.stop_folder_watch()
+        self._stop_instance_server()
+        self.logic._save_settings(self.geometry(), self.i18n.current_code, flush=True)
         self.destroy()
 
     def _load_settings(self):
@@ -100,9 +148,19 @@ class AspectRatioCalculator(TkinterDnD.Tk):
                 button_key = key.replace("_original", "").replace("_target", "")
                 widget.config(text=self.i18n.get_string(button_key))
 
-        lang_choices = self.i18n.get_available_languages()
-        current_name = next((name for name, code in lang_choices.items() if code == self.i18n.current_code), self.i18n.default_code)
-        self.lang_var.set(current_name)
+        self._refresh_fit_mode_choices()
+        self.lang_var.set(self.i18n.get_language_name(self.i18n.current_code))
+
+    def _refresh_fit_mode_choices(self):
+        labels = [self.i18n.get_string(f"fit_mode_{mode}") for mode in FIT_MODES]
+        self.fit_mode_combo.config(values=labels)
+        self.fit_mode_combo.set(labels[FIT_MODES.index(self.fit_mode_var.get())])
+
+    def _on_fit_mode_selected(self, event):
+        self.fit_mode_var.set(FIT_MODES[self.fit_mode_combo.current()])
+        self.settings["fit_mode"] = self.fit_mode_var.get()
+        if self.live_calculate_var.get():
+            self.logic.calculate_aspects()
 
     def _setup_context_menu(self):
         self.context_menu = tk.Menu(self, tearoff=0)
@@ -157,12 +215,59 @@ class AspectRatioCalculator(TkinterDnD.Tk):
 
     def _on_settings_window_close(self):
         self._on_settings_window_configure(None)
-        SettingsManager.save_settings(self.settings)
+        store = get_settings_store()
+        store.replace(self.settings)
+        store.schedule_flush()
         if self.settings_window and self.settings_window.winfo_exists():
             self.settings_window.grab_release()
             self.settings_window.destroy()
             self.settings_window = None
 
+    def _on_live_calculate_toggled(self):
+        self.settings["live_calculate"] = self.live_calculate_var.get()
+        if self.live_calculate_var.get():
+            self.logic.calculate_aspects()
+
+    def _on_watch_folder_toggled(self):
+        self.settings["watch_folder"] = self.watch_folder_var.get()
+        self.logic.update_folder_watch()
+
+    def _on_single_instance_toggled(self):
+        self.settings["single_instance"] = self.single_instance_var.get()
+        self._update_instance_server()
+
+    def _update_instance_server(self):
+        if not self.single_instance_var.get():
+            self._stop_instance_server()
+            return
+        if self.instance_server is not None:
+            return
+
+        from single_instance import InstanceServer
+        server = InstanceServer(self._instance_requests.put)
+        if server.start():
+            self.instance_server = server
+            self.after(INSTANCE_POLL_MS, self._poll_instance_requests, server)
+
+    def _stop_instance_server(self):
+        if self.instance_server is not None:
+            self.instance_server.close()
+            self.instance_server = None
+
+    def _poll_instance_requests(self, server):
+        if server is not self.instance_server:
+            return
+        while True:
+            try:
+                paths = self._instance_requests.get_nowait()
+            except queue.Empty:
+                break
+            self.deiconify()
+            self.lift()
+            self.focus_force()
+            self.open_paths(paths)
+        self.after(INSTANCE_POLL_MS, self._poll_instance_requests, server)
+
     def _create_settings_window(self):
         if self.settings_window and self.settings_window.winfo_exists():
             self.settings_window.lift()
@@ -190,7 +295,7 @@ class AspectRatioCalculator(TkinterDnD.Tk):
         self.settings_window.update_idletasks()
         if not geometry_applied:
             win_w = 300
-            win_h = 150
+            win_h = 350
         else:
             win_w = self.settings_window.winfo_width()
             win_h = self.settings_window.winfo_height()
@@ -211,8 +316,35 @@ class AspectRatioCalculator(TkinterDnD.Tk):
                                           variable=self.auto_calculate_image_var)
         auto_calc_check.grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
 
+        watch_label = ttk.Label(frame, text=self.i18n.get_string("watch_folder") + ":")
+        watch_label.grid(row=2, column=0, sticky=tk.W, padx=5, pady=5)
+
+        watch_check = ttk.Checkbutton(frame,
+                                      text=self.i18n.get_string("on_off"),
+                                      variable=self.watch_folder_var,
+                                      command=self._on_watch_folder_toggled)
+        watch_check.grid(row=3, column=0, sticky=tk.W, padx=5, pady=5)
+
+        live_calc_label = ttk.Label(frame, text=self.i18n.get_string("live_calc") + ":")
+        live_calc_label.grid(row=4, column=0, sticky=tk.W, padx=5, pady=5)
+
+        live_calc_check = ttk.Checkbutton(frame,
+                                          text=self.i18n.get_string("on_off"),
+                                          variable=self.live_calculate_var,
+                                          command=self._on_live_calculate_toggled)
+        live_calc_check.grid(row=5, column=0, sticky=tk.W, padx=5, pady=5)
+
+        single_instance_label = ttk.Label(frame, text=self.i18n.get_string("single_instance") + ":")
+        single_instance_label.grid(row=6, column=0, sticky=tk.W, padx=5, pady=5)
+
+        single_instance_check = ttk.Checkbutton(frame,
+                                                text=self.i18n.get_string("on_off"),
+                                                variable=self.single_instance_var,
+                                                command=self._on_single_instance_toggled)
+        single_instance_check.grid(row=7, column=0, sticky=tk.W, padx=5, pady=5)
+
         close_button = ttk.Button(frame, text=self.i18n.get_string("close"), command=self._on_settings_window_close)
-        close_button.grid(row=2, column=0, columnspan=2, pady=10)
+        close_button.grid(row=8, column=0, columnspan=2, pady=10)
         self.settings_window.bind("<Configure>", self._on_settings_window_configure)
         self.settings_window.protocol("WM_DELETE_WINDOW", self._on_settings_window_close)
 
@@ -237,18 +369,14 @@ class AspectRatioCalculator(TkinterDnD.Tk):
         lang_label.grid(row=0, column=1, sticky=tk.W, padx=(0, 5))
         self.labels["language_label"] = lang_label
 
-        lang_choices = self.i18n.get_available_languages()
-        lang_names = list(lang_choices.keys())
-
-        current_name = next((name for name, code in lang_choices.items() if code == self.i18n.current_code), self.i18n.default_code)
+        current_name = self.i18n.get_language_name(self.i18n.current_code)
 
         self.lang_var = tk.StringVar(self)
         self.lang_var.set(current_name)
 
-        lang_menu = ttk.OptionMenu(config_lang_frame, self.lang_var, current_name, *lang_names,
-                                   command=lambda choice: self._change_language(lang_choices[choice]))
-        lang_menu.config(width=8)
-        lang_menu.grid(row=0, column=2, sticky=tk.E)
+        self.lang_menu = ttk.OptionMenu(config_lang_frame, self.lang_var, current_name, current_name)
+        self.lang_menu.config(width=8)
+        self.lang_menu.grid(row=0, column=2, sticky=tk.E)
         row_num = 1
         label = ttk.Label(main_frame, text=self.i18n.get_string('image_section'), font=('Arial', 10, 'bold'))
         label.grid(row=row_num, column=0, columnspan=3, pady=(0, 5), sticky=tk.W)
@@ -277,6 +405,11 @@ class AspectRatioCalculator(TkinterDnD.Tk):
         button.grid(row=row_num, column=0, columnspan=3, pady=(5, 5), sticky=(tk.W, tk.E))
         self.labels["calculate_image"] = button
         row_num += 1
+        busy_indicator = ttk.Progressbar(main_frame, mode='indeterminate')
+        busy_indicator.grid(row=row_num, column=0, columnspan=3, sticky=(tk.W, tk.E), padx=5)
+        busy_indicator.grid_remove()
+        self.logic.busy_indicator = busy_indicator
+        row_num += 1
         label = ttk.Label(main_frame, text=self.i18n.get_string('original_section'), font=('Arial', 10, 'bold'))
         label.grid(row=row_num, column=0, columnspan=3, pady=(10, 5), sticky=tk.W)
         self.labels["original_section"] = label
@@ -324,6 +457,14 @@ class AspectRatioCalculator(TkinterDnD.Tk):
         self._add_input_field(main_frame, "width_target", row_num, "target_w", span=2)
         row_num += 1
         self._add_input_field(main_frame, "height_target", row_num, "target_h", span=2)
+        row_num += 1
+        label = ttk.Label(main_frame, text=self.i18n.get_string("fit_mode") + ":")
+        label.grid(row=row_num, column=0, sticky=tk.W, padx=5, pady=2)
+        self.labels["fit_mode"] = label
+
+        self.fit_mode_combo = ttk.Combobox(main_frame, state='readonly', width=18)
+        self.fit_mode_combo.grid(row=row_num, column=1, columnspan=2, sticky=(tk.W, tk.E), padx=5, pady=2)
+        self.fit_mode_combo.bind("<<ComboboxSelected>>", self._on_fit_mode_selected)
         target_btn_frame = ttk.Frame(main_frame)
         target_btn_frame.grid(row=row_num + 1, column=0, columnspan=3, sticky=tk.W + tk.E, pady=(10, 5))
         target_btn_frame.columnconfigure(0, weight=1)
@@ -363,6 +504,8 @@ class AspectRatioCalculator(TkinterDnD.Tk):
         self._add_output_entry(main_frame, "width_final", row_num, "out_final_w", span=2)
         row_num += 1
         self._add_output_entry(main_frame, "height_final", row_num, "out_final_h", span=2)
+        row_num += 1
+        self._add_output_entry(main_frame, "offset_final", row_num, "out_final_offset", span=2)
 
         self._load_input_values_after_widgets()
         self._update_all_texts()
@@ -414,28 +557,32 @@ class AspectRatioCalculator(TkinterDnD.Tk):
         self.output_entries[key] = output_entry
 
     def _open_file_dialog(self):
-        file_types = [("Image files", "*.jpg *.jpeg *.png *.bmp *.gif *.webp")]
+        file_types = [("Image files", " ".join(f"*{ext}" for ext in IMAGE_EXTENSIONS)),
+                      ("Video files", " ".join(f"*{ext}" for ext in VIDEO_EXTENSIONS)),
+                      ("Archives", " ".join(f"*{ext}" for ext in ARCHIVE_EXTENSIONS))]
         file_path = filedialog.askopenfilename(
             title=self.i18n.get_string("title"),
             filetypes=file_types
         )
         if file_path:
             self.logic.update_input_entry("image_path", file_path)
+            self.logic.update_folder_watch()
             if self.auto_calculate_image_var.get():
                 self.logic.calculate_image_dimensions()
 
     def _handle_drop(self, event):
-        dropped_path_raw = event.data.strip()
+        self.open_paths([path for path in self.tk.splitlist(event.data.strip()) if path])
 
-        if dropped_path_raw.startswith('{') and dropped_path_raw.endswith('}'):
-            file_path = dropped_path_raw[1:-1]
-        elif ' ' in dropped_path_raw:
-            files = dropped_path_raw.split(' ')
-            file_path = files[0].strip('{}')
-        else:
-            file_path = dropped_path_raw
+    def open_paths(self, paths: list[str]):
+        if not paths:
+            return
+        if len(paths) > 1 or os.path.isdir(paths[0]):
+            self.logic.show_batch_results(paths)
+            return
 
+        file_path = paths[0]
         self.logic.update_input_entry("image_path", file_path)
+        self.logic.update_folder_watch()
 
         if self.auto_calculate_image_var.get():
             self.logic.calculate_image_dimensions()
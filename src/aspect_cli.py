@@ -0,0 +1,276 @@
+import argparse
+import csv
+import json
+import math
+import sys
+
+from aspect_logic import Ratio, format_ratio, get_image_dimensions, resolve_final_dimensions
+from dimension_cache import add_cache_argument, cached_probe
+from ratio_engine import nearest_standard_ratio
+
+INPUT_FIELDS = ("path", "original_w", "original_h", "target_ratio_w", "target_ratio_h", "target_w", "target_h")
+OUTPUT_FIELDS = ("original_ratio", "standard_ratio", "final_ratio", "final_w", "final_h")
+
+
+def _to_float(value) -> float:
+    # JSON のオブジェクトや配列など、数値にならない値は値なしとして扱う
+    if not isinstance(value, (int, float, str)):
+        return None
+    if isinstance(value, str) and not value.strip():
+        return None
+    try:
+        number = float(value)
+    except (ValueError, OverflowError):
+        return None
+    # inf / nan は後段の int() や約分で例外になるため、値なしとして扱う
+    return number if math.isfinite(number) else None
+
+
+def _to_number(value):
+    if value is None:
+        return None
+    if value == int(value):
+        return int(value)
+    return value
+
+
+def process_row(row: dict, probe=get_image_dimensions) -> dict:
+    result = dict(row)
+    orig_w = _to_float(row.get("original_w"))
+    orig_h = _to_float(row.get("original_h"))
+
+    path = row.get("path")
+    if path and (orig_w is None or orig_h is None):
+        width, height = probe(path)
+        orig_w = _to_float(width)
+        orig_h = _to_float(height)
+        result["original_w"] = width
+        result["original_h"] = height
+
+    original_ratio, final_ratio, final_w, final_h = resolve_final_dimensions(
+        orig_w, orig_h,
+        _to_float(row.get("target_ratio_w")), _to_float(row.get("target_ratio_h")),
+        _to_float(row.get("target_w")), _to_float(row.get("target_h"))
+    )
+    standard = nearest_standard_ratio(orig_w, orig_h)
+    result["original_ratio"] = format_ratio(original_ratio)
+    result["standard_ratio"] = standard.label if standard is not None else ""
+    result["final_ratio"] = format_ratio(final_ratio)
+    result["final_w"] = _to_number(final_w)
+    result["final_h"] = _to_number(final_h)
+    return result
+
+
+def _detect_format(first_line: str, file_name: str) -> str:
+    if file_name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if file_name.endswith(".csv"):
+        return "csv"
+    return "jsonl" if first_line.lstrip().startswith("{") else "csv"
+
+
+def _iter_csv_rows(first_line: str, lines):
+    header = next(csv.reader([first_line]), [])
+    if any(field.strip() in INPUT_FIELDS for field in header):
+        yield from csv.DictReader(lines, fieldnames=[field.strip() for field in header])
+        return
+
+    for fields in csv.reader(_chain_line(first_line, lines)):
+        if fields and fields[0].strip():
+            yield {"path": fields[0].strip()}
+
+
+def _iter_jsonl_rows(first_line: str, lines):
+    for line in _chain_line(first_line, lines):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            print(f"警告: JSON 行の解析に失敗しました: {e}", file=sys.stderr)
+            continue
+        if not isinstance(row, dict):
+            print(f"警告: JSON 行がオブジェクトではありません: {line[:80]}", file=sys.stderr)
+            continue
+        yield row
+
+
+def _chain_line(first_line: str, lines):
+    yield first_line
+    yield from lines
+
+
+class _CsvOutput:
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.writer = None
+
+    def write(self, row: dict):
+        if self.writer is None:
+            fieldnames = [key for key in row if key not in OUTPUT_FIELDS] + list(OUTPUT_FIELDS)
+            self.writer = csv.DictWriter(self.stream, fieldnames=fieldnames, extrasaction='ignore', lineterminator='\n')
+            self.writer.writeheader()
+        self.writer.writerow(row)
+
+
+class _JsonlOutput:
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, row: dict):
+        self.stream.write(json.dumps(row, ensure_ascii=False))
+        self.stream.write("\n")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="run_cli.py",
+        description="Aspect Ratio Calculator (headless). Reads CSV/JSONL rows and streams results to stdout."
+    )
+    parser.add_argument("inputs", nargs="*", default=["-"],
+                        help="input files (CSV or JSONL). '-' reads from stdin (default)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], dest="input_format",
+                        help="input format (default: detect from file name or first line)")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"],
+                        help="output format (default: same as the first input)")
+    add_cache_argument(parser)
+    return parser
+
+
+def _run_export(argv: list[str]) -> int:
+    from batch_export import main as export_main
+    return export_main(argv)
+
+
+def _run_watch(argv: list[str]) -> int:
+    from watch_folder import main as watch_main
+    return watch_main(argv)
+
+
+def _run_serve(argv: list[str]) -> int:
+    from aspect_server import main as serve_main
+    return serve_main(argv)
+
+
+def _run_index(argv: list[str]) -> int:
+    from ratio_index import main as index_main
+    return index_main(argv)
+
+
+def _run_resolutions(argv: list[str]) -> int:
+    from ratio_engine import closest_resolution, iter_resolutions
+
+    parser = argparse.ArgumentParser(
+        prog="run_cli.py resolutions",
+        description="List exact integer resolutions for a ratio, optionally aligned to a block size."
+    )
+    parser.add_argument("ratio", help="ratio such as 16:9 or 2.39:1")
+    parser.add_argument("--align", type=int, default=1, help="both sides must be multiples of this (e.g. 2, 8, 16, 64)")
+    parser.add_argument("--min-width", type=float)
+    parser.add_argument("--max-width", type=float)
+    parser.add_argument("--min-height", type=float)
+    parser.add_argument("--max-height", type=float)
+    parser.add_argument("--min-megapixels", type=float)
+    parser.add_argument("--max-megapixels", type=float)
+    parser.add_argument("--closest-width", type=float, help="print only the aligned size closest to this width")
+    parser.add_argument("--closest-height", type=float, help="print only the aligned size closest to this height")
+    args = parser.parse_args(argv)
+
+    try:
+        ratio = Ratio.parse(args.ratio)
+    except ValueError as e:
+        parser.error(str(e))
+    ratio_w, ratio_h = ratio.width, ratio.height
+    if args.align < 1:
+        parser.error("--align must be 1 or greater")
+
+    bounds = {
+        "min_width": args.min_width, "max_width": args.max_width,
+        "min_height": args.min_height, "max_height": args.max_height,
+        "min_megapixels": args.min_megapixels, "max_megapixels": args.max_megapixels,
+    }
+    if args.closest_width is not None or args.closest_height is not None:
+        resolution = closest_resolution(ratio_w, ratio_h, args.closest_width, args.closest_height, args.align, **bounds)
+        resolutions = [] if resolution is None else [resolution]
+    else:
+        if bounds["max_width"] is None and bounds["max_height"] is None and bounds["max_megapixels"] is None:
+            parser.error("an upper bound (--max-width, --max-height or --max-megapixels) is required")
+        resolutions = iter_resolutions(ratio_w, ratio_h, args.align, **bounds)
+
+    writer = csv.writer(sys.stdout, lineterminator='\n')
+    writer.writerow(("width", "height"))
+    try:
+        for resolution in resolutions:
+            writer.writerow(resolution)
+    except BrokenPipeError:
+        return 1
+    return 0
+
+
+SUBCOMMANDS = {
+    "export": _run_export,
+    "watch": _run_watch,
+    "serve": _run_serve,
+    "resolutions": _run_resolutions,
+    "index": _run_index,
+}
+
+
+def main(argv: list[str] = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in SUBCOMMANDS:
+        return SUBCOMMANDS[argv[0]](argv[1:])
+
+    args = build_parser().parse_args(argv)
+    with cached_probe(args.cache) as probe:
+        return _process_inputs(args, probe)
+
+
+def _process_inputs(args: argparse.Namespace, probe) -> int:
+    output = None
+    try:
+        for input_name in args.inputs:
+            if input_name == "-":
+                stream = sys.stdin
+            else:
+                try:
+                    stream = open(input_name, 'r', encoding='utf-8', newline='')
+                except OSError as e:
+                    print(f"エラー: 入力ファイルを開けませんでした ({input_name}): {e}", file=sys.stderr)
+                    continue
+
+            try:
+                first_line = stream.readline()
+                if not first_line:
+                    continue
+                input_format = args.input_format or _detect_format(first_line, input_name)
+                if output is None:
+                    output_format = args.output_format or input_format
+                    output = _JsonlOutput(sys.stdout) if output_format == "jsonl" else _CsvOutput(sys.stdout)
+
+                if input_format == "jsonl":
+                    rows = _iter_jsonl_rows(first_line, stream)
+                else:
+                    rows = _iter_csv_rows(first_line, stream)
+
+                for row in rows:
+                    try:
+                        result = process_row(row, probe)
+                    except (ArithmeticError, TypeError, ValueError) as e:
+                        print(f"警告: 行を処理できませんでした ({row.get('path') or row}): {e}", file=sys.stderr)
+                        continue
+                    output.write(result)
+            finally:
+                if stream is not sys.stdin:
+                    stream.close()
+    except BrokenPipeError:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
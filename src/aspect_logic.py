@@ -1,5 +1,15 @@
-import os
-from PIL import Image
+import time
+from operator import itemgetter
+from typing import NamedTuple
+
+import metrics
+from image_probe import ImageInfo, apply_orientation, probe_image_info
+from ratio_engine import exact_ratio
+from video_probe import probe_video
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp")
+
+_new_tuple = tuple.__new__
 
 
 def gcd(a: int, b: int) -> int:
@@ -8,63 +18,187 @@ def gcd(a: int, b: int) -> int:
     return a
 
 
-def simplify_aspect_ratio(width: float, height: float) -> str:
+def format_ratio_part(value: float) -> str:
+    return str(int(value)) if value == int(value) else str(value)
+
+
+class Ratio(tuple):
+
+    __slots__ = ()
+
+    def __new__(cls, width: float, height: float):
+        if width is None or height is None or not width > 0 or not height > 0:
+            raise ValueError(f"invalid ratio: {width}:{height}")
+        return _new_tuple(cls, (width, height, width / height))
+
+    def __getnewargs__(self):
+        return self[0], self[1]
+
+    width = property(itemgetter(0))
+    height = property(itemgetter(1))
+    value = property(itemgetter(2))
+
+    @classmethod
+    def parse(cls, text: str) -> "Ratio":
+        try:
+            width, height = (float(part) for part in text.split(':'))
+            return cls(width, height)
+        except (AttributeError, ValueError):
+            raise ValueError(f"invalid ratio: {text}") from None
+
+    @property
+    def reduced(self) -> tuple[int, int]:
+        return exact_ratio(self[0], self[1])
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Ratio):
+            return NotImplemented
+        return self[:2] == other[:2] or self.reduced == other.reduced
+
+    def __ne__(self, other) -> bool:
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self) -> int:
+        return hash(self.reduced)
+
+    def __repr__(self) -> str:
+        return f"Ratio({self[0]!r}, {self[1]!r})"
+
+    def __str__(self) -> str:
+        return f"{format_ratio_part(self[0])}:{format_ratio_part(self[1])}"
+
+
+class Dimensions(NamedTuple):
+    width: float
+    height: float
+
+
+def format_ratio(ratio: Ratio) -> str:
+    return "N/A" if ratio is None else str(ratio)
+
+
+def simplify_aspect_ratio(width: float, height: float) -> Ratio:
     if width is None or height is None or width <= 0 or height <= 0:
-        return "N/A"
+        return None
 
     w_int = int(round(width * 100))
     h_int = int(round(height * 100))
     if w_int == 0 or h_int == 0:
-        return f"{width:.2f}:{height:.2f}"
+        return _new_tuple(Ratio, (width, height, width / height))
 
     common_divisor = gcd(w_int, h_int)
 
     simple_w = w_int // common_divisor
     simple_h = h_int // common_divisor
 
-    return f"{simple_w}:{simple_h}"
+    return _new_tuple(Ratio, (simple_w, simple_h, simple_w / simple_h))
 
 
-def calculate_new_dimensions(ratio: str, target_w: float, target_h: float, fallback_w: float = None, fallback_h: float = None) -> tuple[float, float]:
-    try:
-        r_parts = ratio.split(':')
-        ratio_w = float(r_parts[0])
-        ratio_h = float(r_parts[1])
-    except (ValueError, IndexError):
-        return fallback_w, fallback_h
-
-    if ratio_w <= 0 or ratio_h <= 0:
-        return fallback_w, fallback_h
+def calculate_new_dimensions(ratio: Ratio, target_w: float, target_h: float, fallback_w: float = None, fallback_h: float = None) -> Dimensions:
+    if ratio is None:
+        return Dimensions(fallback_w, fallback_h)
+    ratio_w, ratio_h, _ = ratio
 
     if target_w is not None:
         new_w = target_w
         new_h = (target_w / ratio_w) * ratio_h
-        return new_w, new_h
+        return _new_tuple(Dimensions, (new_w, new_h))
 
     elif target_h is not None:
         new_h = target_h
         new_w = (target_h / ratio_h) * ratio_w
-        return new_w, new_h
+        return _new_tuple(Dimensions, (new_w, new_h))
 
     elif fallback_w is not None:
         new_w = fallback_w
         new_h = (fallback_w / ratio_w) * ratio_h
-        return new_w, new_h
+        return _new_tuple(Dimensions, (new_w, new_h))
 
     elif fallback_h is not None:
         new_h = fallback_h
         new_w = (fallback_h / ratio_h) * ratio_w
-        return new_w, new_h
+        return _new_tuple(Dimensions, (new_w, new_h))
+
+    return Dimensions(None, None)
+
+
+def _dimensions_for_targets(ratio: Ratio, target_w: float, target_h: float) -> Dimensions:
+    if target_w is not None and target_h is not None:
+        if target_w >= target_h:
+            return calculate_new_dimensions(ratio, target_w, None)
+        return calculate_new_dimensions(ratio, None, target_h)
+    return calculate_new_dimensions(ratio, target_w, target_h)
+
+
+def resolve_final_dimensions(orig_w: float, orig_h: float, target_ratio_w: float, target_ratio_h: float,
+                             target_w: float, target_h: float) -> tuple[Ratio, Ratio, float, float]:
+    original_ratio = simplify_aspect_ratio(orig_w, orig_h)
+    final_ratio = original_ratio
+    final_w = orig_w
+    final_h = orig_h
 
-    return None, None
+    if target_ratio_w is not None and target_ratio_h is not None and target_ratio_w > 0 and target_ratio_h > 0:
+        final_ratio = Ratio(target_ratio_w, target_ratio_h)
 
+        if target_w is not None or target_h is not None:
+            final_w, final_h = _dimensions_for_targets(final_ratio, target_w, target_h)
+        elif orig_w is not None and orig_h is not None:
+            final_w, final_h = calculate_new_dimensions(final_ratio, None, None, orig_w, orig_h)
 
-def get_image_dimensions(image_path: str) -> tuple[int, int]:
-    if not os.path.exists(image_path):
-        return None, None
+    elif original_ratio is not None and (target_w is not None or target_h is not None):
+        final_w, final_h = _dimensions_for_targets(original_ratio, target_w, target_h)
 
+    return original_ratio, final_ratio, final_w, final_h
+
+
+def _pillow_image_info(img) -> ImageInfo:
+    orientation = img.getexif().get(0x0112, 1)
+    if orientation not in range(1, 9):
+        orientation = 1
+    # TIFF は Pillow 側で縦横を入れ替えて報告するため、保存されている寸法から向きを適用する
+    tags = getattr(img, "tag_v2", None)
+    if tags is not None and 0x0100 in tags and 0x0101 in tags:
+        width, height = tags[0x0100], tags[0x0101]
+    else:
+        width, height = img.size
+    return apply_orientation(width, height, orientation, img.info.get("dpi"))
+
+
+def _read_image_info(image_path: str) -> tuple[str, ImageInfo]:
     try:
-        with Image.open(image_path) as img:
-            return img.size
+        with open(image_path, 'rb') as f:
+            info = probe_image_info(f)
+            if info is not None:
+                return "ok", info
+
+            video = probe_video(f)
+            if video is not None:
+                return "ok", ImageInfo(video.display_width, video.display_height)
+
+            from PIL import Image
+
+            f.seek(0)
+            with Image.open(f) as img:
+                return "ok", _pillow_image_info(img)
+    except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+        return "missing", None
     except Exception:
-        return None, None
+        return "error", None
+
+
+def get_image_info(image_path: str) -> ImageInfo:
+    if not metrics.enabled:
+        return _read_image_info(image_path)[1]
+
+    start = time.perf_counter()
+    outcome, info = _read_image_info(image_path)
+    metrics.observe("get_image_dimensions", time.perf_counter() - start, outcome=outcome)
+    return info
+
+
+def get_image_dimensions(image_path: str) -> Dimensions:
+    info = get_image_info(image_path)
+    if info is None:
+        return Dimensions(None, None)
+    return Dimensions(info.width, info.height)
@@ -0,0 +1,304 @@
+import argparse
+import asyncio
+import ipaddress
+import json
+import math
+import os
+import stat
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import metrics
+from aspect_logic import (Dimensions, Ratio, calculate_new_dimensions, format_ratio, get_image_dimensions,
+                          resolve_final_dimensions, simplify_aspect_ratio)
+from dimension_cache import add_cache_argument, cached_probe
+from target_solver import MODE_CONTAIN, solve_target
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+
+class OpStats:
+
+    __slots__ = ("count", "errors", "total_seconds", "max_seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def add(self, seconds: float, ok: bool):
+        self.count += 1
+        if not ok:
+            self.errors += 1
+        self.total_seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": self.total_seconds / self.count * 1000 if self.count else 0.0,
+            "max_ms": self.max_seconds * 1000,
+        }
+
+
+def _number(value) -> float:
+    if value is None:
+        return None
+    return float(value)
+
+
+def _is_finite(value) -> bool:
+    if isinstance(value, float):
+        return math.isfinite(value)
+    if isinstance(value, dict):
+        return all(_is_finite(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return all(_is_finite(item) for item in value)
+    return True
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _is_socket(path: str) -> bool:
+    try:
+        return stat.S_ISSOCK(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+def _remove_stale_socket(path: str):
+    # 通常ファイルなどを誤って消さないよう、ソケット以外が置かれていたら起動しない
+    if _is_socket(path):
+        os.unlink(path)
+    elif os.path.lexists(path):
+        raise FileExistsError(f"not a socket: {path}")
+
+
+class AspectServer:
+
+    def __init__(self, workers: int = None, max_pending_probes: int = None,
+                 probe: Callable[[str], Dimensions] = get_image_dimensions):
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        self.probe = probe
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="aspect-probe")
+        self.max_pending_probes = max_pending_probes or self.workers * 4
+        self._probe_slots = None
+
+        self.started = time.monotonic()
+        self.connections = 0
+        self.active_connections = 0
+        self.requests = 0
+        self.op_stats = {}
+
+        self.handlers = {
+            "simplify": self._op_simplify,
+            "dimensions": self._op_dimensions,
+            "resolve": self._op_resolve,
+            "solve": self._op_solve,
+            "probe": self._op_probe,
+            "batch": self._op_batch,
+            "stats": self._op_stats,
+        }
+
+    async def _op_simplify(self, request: dict) -> dict:
+        ratio = simplify_aspect_ratio(_number(request.get("width")), _number(request.get("height")))
+        return {"ratio": format_ratio(ratio)}
+
+    async def _op_dimensions(self, request: dict) -> dict:
+        try:
+            ratio = Ratio.parse(str(request.get("ratio", "")))
+        except ValueError:
+            ratio = None
+        width, height = calculate_new_dimensions(
+            ratio,
+            _number(request.get("target_w")), _number(request.get("target_h")),
+            _number(request.get("fallback_w")), _number(request.get("fallback_h"))
+        )
+        return {"width": width, "height": height}
+
+    async def _op_resolve(self, request: dict) -> dict:
+        original_ratio, final_ratio, final_w, final_h = resolve_final_dimensions(
+            _number(request.get("original_w")), _number(request.get("original_h")),
+            _number(request.get("target_ratio_w")), _number(request.get("target_ratio_h")),
+            _number(request.get("target_w")), _number(request.get("target_h"))
+        )
+        return {"original_ratio": format_ratio(original_ratio), "final_ratio": format_ratio(final_ratio),
+                "final_w": final_w, "final_h": final_h}
+
+    async def _op_solve(self, request: dict) -> dict:
+        solution = solve_target(
+            _number(request.get("src_w")), _number(request.get("src_h")),
+            _number(request.get("box_w")), _number(request.get("box_h")),
+            request.get("mode", MODE_CONTAIN),
+            _number(request.get("max_w")), _number(request.get("max_h")), _number(request.get("max_megapixels")),
+            bool(request.get("integer", False)), int(request.get("alignment", 1))
+        )
+        if solution is None:
+            raise ValueError("invalid source size or mode")
+        return solution._asdict()
+
+    async def _op_probe(self, request: dict) -> dict:
+        path = request.get("path")
+        if not isinstance(path, str) or not path:
+            raise ValueError("'path' is required")
+
+        if self._probe_slots is None:
+            self._probe_slots = asyncio.Semaphore(self.max_pending_probes)
+        async with self._probe_slots:
+            width, height = await asyncio.get_running_loop().run_in_executor(self.executor, self.probe, path)
+        return {"width": width, "height": height, "ratio": format_ratio(simplify_aspect_ratio(width, height))}
+
+    async def _op_batch(self, request: dict) -> list:
+        items = request.get("items")
+        if not isinstance(items, list):
+            raise ValueError("'items' must be a list")
+        return await asyncio.gather(*(self.handle(item, nested=True) for item in items))
+
+    async def _op_stats(self, request: dict) -> dict:
+        uptime = time.monotonic() - self.started
+        return {
+            "uptime_seconds": uptime,
+            "connections": self.connections,
+            "active_connections": self.active_connections,
+            "requests": self.requests,
+            "requests_per_second": self.requests / uptime if uptime > 0 else 0.0,
+            "ops": {op: stats.as_dict() for op, stats in sorted(self.op_stats.items())},
+        }
+
+    async def handle(self, request, nested: bool = False) -> dict:
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "request must be a JSON object"}
+
+        op = request.get("op")
+        handler = self.handlers.get(op)
+        response = {"id": request["id"]} if "id" in request else {}
+        if handler is None or (nested and op == "batch"):
+            response.update(ok=False, error=f"unknown op: {op}")
+            return response
+
+        start = time.perf_counter()
+        try:
+            result = await handler(request)
+            # Infinity / NaN は JSON として不正なため、その要求だけエラーにする
+            if not _is_finite(result):
+                raise ValueError("result is not finite")
+            response.update(ok=True, result=result)
+        except Exception as e:
+            response.update(ok=False, error=str(e) or type(e).__name__)
+        elapsed = time.perf_counter() - start
+
+        self.requests += 1
+        stats = self.op_stats.get(op)
+        if stats is None:
+            stats = self.op_stats[op] = OpStats()
+        stats.add(elapsed, response["ok"])
+        metrics.observe("server_request", elapsed, op=op)
+        return response
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self.active_connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    writer.write(b'{"ok": false, "error": "request too large"}\n')
+                    break
+                if not line:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    response = {"ok": False, "error": f"invalid JSON: {e}"}
+                else:
+                    response = await self.handle(request)
+
+                try:
+                    data = json.dumps(response, ensure_ascii=False, allow_nan=False)
+                except ValueError:
+                    data = json.dumps({"ok": False, "error": "result is not finite"})
+                writer.write(data.encode('utf-8') + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.active_connections -= 1
+            writer.close()
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_path: str = None):
+        if unix_path:
+            _remove_stale_socket(unix_path)
+            return await asyncio.start_unix_server(self.handle_connection, path=unix_path, limit=MAX_LINE_BYTES)
+        return await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE_BYTES)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _serve(server: AspectServer, host: str, port: int, unix_path: str):
+    listener = await server.start(host, port, unix_path)
+    address = unix_path or ":".join(str(part) for part in listener.sockets[0].getsockname()[:2])
+    print(f"listening on {address}", file=sys.stderr, flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="run_cli.py serve",
+        description="Serve the aspect engine as newline-delimited JSON over a local socket."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"address to bind (default: {DEFAULT_HOST})")
+    parser.add_argument("--allow-remote", action="store_true",
+                        help="allow --host to be a non-loopback address (the probe op reads any path on this machine)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"TCP port (default: {DEFAULT_PORT})")
+    parser.add_argument("--unix", dest="unix_path", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, help="threads used for file probes")
+    add_cache_argument(parser)
+    args = parser.parse_args(argv)
+
+    if not args.unix_path and not _is_loopback(args.host):
+        # probe はサーバー上の任意のパスを読むため、外部に公開するときは明示的な指定を求める
+        if not args.allow_remote:
+            print(f"エラー: ループバック以外のアドレス ({args.host}) で待ち受けるには --allow-remote を指定してください",
+                  file=sys.stderr)
+            return 1
+        print(f"警告: {args.host} で待ち受けます。probe 操作でサーバー上のファイルを読み取れます", file=sys.stderr)
+
+    if args.unix_path and not hasattr(asyncio, "start_unix_server"):
+        print("エラー: この環境では Unix ソケットを使用できません", file=sys.stderr)
+        return 1
+
+    with cached_probe(args.cache) as probe:
+        server = AspectServer(workers=args.workers, probe=probe)
+        try:
+            asyncio.run(_serve(server, args.host, args.port, args.unix_path))
+        except KeyboardInterrupt:
+            pass
+        except OSError as e:
+            print(f"エラー: サーバーを起動できませんでした: {e}", file=sys.stderr)
+            return 1
+        finally:
+            server.close()
+            if args.unix_path and _is_socket(args.unix_path):
+                os.unlink(args.unix_path)
+    return 0
@@ -0,0 +1,217 @@
+import argparse
+import csv
+import os
+import sys
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+from aspect_logic import Ratio, get_image_info, resolve_final_dimensions
+from directory_scanner import iter_image_files, submit_bounded
+from target_solver import MODE_COVER, MODE_PAD, solve_target
+
+EXPORT_MODES = ("resize", "crop", "pad")
+REPORT_FIELDS = ("source", "output", "original_w", "original_h", "final_w", "final_h", "status", "error")
+
+_ORIENTATION_TRANSPOSE = {
+    2: "FLIP_LEFT_RIGHT",
+    3: "ROTATE_180",
+    4: "FLIP_TOP_BOTTOM",
+    5: "TRANSPOSE",
+    6: "ROTATE_270",
+    7: "TRANSVERSE",
+    8: "ROTATE_90",
+}
+
+
+class ExportOptions(NamedTuple):
+    output_dir: str
+    target_ratio_w: float = None
+    target_ratio_h: float = None
+    target_w: float = None
+    target_h: float = None
+    mode: str = "crop"
+    output_format: str = None
+    quality: int = 90
+    background: tuple = (0, 0, 0)
+    overwrite: bool = False
+
+
+class ExportResult(NamedTuple):
+    source: str
+    output: str
+    original_w: int
+    original_h: int
+    final_w: int
+    final_h: int
+    status: str
+    error: str = ""
+
+
+def iter_export_sources(inputs: Iterable[str], recursive: bool = True) -> Iterator[tuple[str, str]]:
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            for path in iter_image_files(input_path, recursive):
+                yield path, os.path.relpath(path, input_path)
+        else:
+            yield input_path, os.path.basename(input_path)
+
+
+def _open_for_size(path: str, needed_w: int, needed_h: int, orientation: int = 1):
+    from PIL import Image
+
+    if orientation >= 5:
+        needed_w, needed_h = needed_h, needed_w
+    img = Image.open(path)
+    if img.format == "JPEG":
+        img.draft(None, (needed_w, needed_h))
+
+    factor = min(img.width // needed_w, img.height // needed_h)
+    if factor >= 2:
+        reduced = img.reduce(factor)
+        img.close()
+        img = reduced
+    return img
+
+
+def export_image(source: str, relative_path: str, options: ExportOptions) -> ExportResult:
+    from PIL import Image
+
+    info = get_image_info(source)
+    if info is None:
+        return ExportResult(source, "", None, None, None, None, "error", "error_image_load")
+    orig_w, orig_h = info.width, info.height
+
+    _, _, final_w, final_h = resolve_final_dimensions(
+        float(orig_w), float(orig_h), options.target_ratio_w, options.target_ratio_h, options.target_w, options.target_h
+    )
+    final_w = max(1, round(final_w))
+    final_h = max(1, round(final_h))
+
+    output_path = os.path.join(options.output_dir, relative_path)
+    if options.output_format:
+        output_path = os.path.splitext(output_path)[0] + "." + options.output_format.lower()
+    if os.path.exists(output_path) and not options.overwrite:
+        return ExportResult(source, output_path, orig_w, orig_h, final_w, final_h, "skipped", "exists")
+
+    try:
+        if options.mode == "resize":
+            scaled_w, scaled_h = final_w, final_h
+            offset_x = offset_y = 0
+        else:
+            solution = solve_target(orig_w, orig_h, final_w, final_h,
+                                    MODE_COVER if options.mode == "crop" else MODE_PAD, integer=True)
+            scaled_w, scaled_h = solution.width, solution.height
+            offset_x, offset_y = solution.offset_x, solution.offset_y
+
+        img = _open_for_size(source, scaled_w, scaled_h, info.orientation)
+        try:
+            source_format = img.format
+            transpose = _ORIENTATION_TRANSPOSE.get(info.orientation)
+            if transpose is not None:
+                transposed = img.transpose(getattr(Image.Transpose, transpose))
+                img.close()
+                img = transposed
+            if img.mode not in ("RGB", "RGBA", "L", "LA"):
+                converted = img.convert("RGBA" if "transparency" in img.info else "RGB")
+                img.close()
+                img = converted
+
+            result = img.resize((scaled_w, scaled_h), Image.Resampling.LANCZOS)
+        finally:
+            img.close()
+
+        if options.mode == "crop":
+            result = result.crop((offset_x, offset_y, offset_x + final_w, offset_y + final_h))
+        elif options.mode == "pad":
+            fill = options.background if result.mode in ("RGB", "RGBA") else options.background[0]
+            canvas = Image.new(result.mode, (final_w, final_h), fill)
+            canvas.paste(result, (offset_x, offset_y))
+            result = canvas
+
+        save_format = (options.output_format or source_format or "PNG").upper()
+        if save_format == "JPG":
+            save_format = "JPEG"
+        save_kwargs = {}
+        if save_format in ("JPEG", "WEBP"):
+            save_kwargs["quality"] = options.quality
+        if save_format == "JPEG" and result.mode not in ("RGB", "L"):
+            result = result.convert("RGB")
+
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        result.save(output_path, save_format, **save_kwargs)
+    except Exception as e:
+        return ExportResult(source, output_path, orig_w, orig_h, final_w, final_h, "error", str(e))
+
+    return ExportResult(source, output_path, orig_w, orig_h, final_w, final_h, "ok")
+
+
+def export_images(sources: Iterable[tuple[str, str]], options: ExportOptions, workers: int = None,
+                  max_in_flight: int = None,
+                  progress: Callable[[int, ExportResult], None] = None) -> Iterator[ExportResult]:
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+
+    arguments = ((source, relative_path, options) for source, relative_path in sources)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        with closing(submit_bounded(executor, export_image, arguments, max_in_flight)) as results:
+            for done_count, result in enumerate(results, 1):
+                if progress is not None:
+                    progress(done_count, result)
+                yield result
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="run_cli.py export",
+        description="Resize, crop or pad images to the calculated target dimensions."
+    )
+    parser.add_argument("inputs", nargs="+", help="image files or folders")
+    parser.add_argument("-o", "--output-dir", required=True, help="folder for the exported images")
+    parser.add_argument("--ratio", help="target ratio such as 16:9")
+    parser.add_argument("--width", type=float, help="target width")
+    parser.add_argument("--height", type=float, help="target height")
+    parser.add_argument("--mode", choices=EXPORT_MODES, default="crop",
+                        help="resize (stretch), crop (fill and crop) or pad (fit and pad). default: crop")
+    parser.add_argument("--format", dest="output_format", help="output format such as jpeg, png or webp")
+    parser.add_argument("--quality", type=int, default=90, help="JPEG/WebP quality (default: 90)")
+    parser.add_argument("--workers", type=int, help="number of worker processes (default: CPU count)")
+    parser.add_argument("--no-recursive", action="store_true", help="do not descend into sub folders")
+    parser.add_argument("--overwrite", action="store_true", help="overwrite existing output files")
+    parser.add_argument("--report", help="write a CSV report to this file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    ratio_w = ratio_h = None
+    if args.ratio:
+        try:
+            ratio = Ratio.parse(args.ratio)
+        except ValueError as e:
+            parser.error(str(e))
+        ratio_w, ratio_h = ratio.width, ratio.height
+
+    options = ExportOptions(
+        output_dir=args.output_dir,
+        target_ratio_w=ratio_w,
+        target_ratio_h=ratio_h,
+        target_w=args.width,
+        target_h=args.height,
+        mode=args.mode,
+        output_format=args.output_format,
+        quality=args.quality,
+        overwrite=args.overwrite,
+    )
+
+    report_stream = open(args.report, 'w', encoding='utf-8', newline='') if args.report else sys.stdout
+    failed = 0
+    try:
+        writer = csv.DictWriter(report_stream, fieldnames=REPORT_FIELDS, lineterminator='\n')
+        writer.writeheader()
+        sources = iter_export_sources(args.inputs, recursive=not args.no_recursive)
+        for result in export_images(sources, options, workers=args.workers):
+            writer.writerow(result._asdict())
+            if result.status == "error":
+                failed += 1
+    finally:
+        if report_stream is not sys.stdout:
+            report_stream.close()
+    return 1 if failed else 0
@@ -0,0 +1,184 @@
+import argparse
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from aspect_logic import Dimensions, get_image_dimensions
+from settings_manager import ensure_parent_dir
+
+CACHE_FILE = 'user/dimension_cache.sqlite3'
+COMMIT_INTERVAL = 256
+SCHEMA_VERSION = 2
+
+
+class DimensionCache:
+
+    def __init__(self, cache_file_path: str = None, max_entries: int = 200_000, memory_entries: int = 10_000,
+                 probe: Callable[[str], Dimensions] = get_image_dimensions):
+        self.cache_file_path = cache_file_path or CACHE_FILE
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.probe = probe
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._pending_writes = 0
+        self._touched = {}
+        self._clock = 0
+
+        if self.cache_file_path != ':memory:':
+            ensure_parent_dir(self.cache_file_path)
+        # CLI の起動を軽くするため、キャッシュを使うときだけ読み込む
+        import sqlite3
+        self._db = sqlite3.connect(self.cache_file_path, check_same_thread=False)
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._db.execute("DROP TABLE IF EXISTS dimensions")
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS dimensions ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, "
+            "width INTEGER, height INTEGER, last_used INTEGER)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS dimensions_last_used ON dimensions (last_used)")
+        self._clock, self._disk_count = self._db.execute(
+            "SELECT COALESCE(MAX(last_used), 0), COUNT(*) FROM dimensions"
+        ).fetchone()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "disk_entries": self._disk_count,
+        }
+
+    def get_image_dimensions(self, image_path: str) -> Dimensions:
+        try:
+            st = os.stat(image_path)
+        except OSError:
+            return Dimensions(None, None)
+        identity = (st.st_size, st.st_mtime_ns, st.st_ino)
+
+        with self._lock:
+            cached = self._memory.get(image_path)
+            if cached is not None and cached[0] == identity:
+                self._memory.move_to_end(image_path)
+                self.hits += 1
+                return cached[1]
+
+            row = self._db.execute(
+                "SELECT size, mtime_ns, inode, width, height FROM dimensions WHERE path = ?", (image_path,)
+            ).fetchone()
+            if row is not None and tuple(row[:3]) == identity:
+                size = Dimensions(row[3], row[4])
+                self._remember(image_path, identity, size)
+                self._clock += 1
+                # ディスクのヒットごとに UPDATE を発行しないよう、コミット時にまとめて書き込む
+                self._touched[image_path] = self._clock
+                self._note_write()
+                self.hits += 1
+                self.disk_hits += 1
+                return size
+
+            self.misses += 1
+
+        size = Dimensions(*self.probe(image_path))
+
+        with self._lock:
+            self._remember(image_path, identity, size)
+            self._clock += 1
+            self._touched.pop(image_path, None)
+            values = (*identity, *size, self._clock, image_path)
+            # 同じパスを別スレッドが先に書き込んでいる場合もあるため、実際に行を追加したときだけ数える
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO dimensions (size, mtime_ns, inode, width, height, last_used, path) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", values
+            )
+            if cursor.rowcount > 0:
+                self._disk_count += 1
+            else:
+                self._db.execute(
+                    "UPDATE dimensions SET size = ?, mtime_ns = ?, inode = ?, width = ?, height = ?, last_used = ? "
+                    "WHERE path = ?", values
+                )
+            self._note_write()
+            if self._disk_count > self.max_entries:
+                self._evict()
+        return size
+
+    def _remember(self, image_path: str, identity: tuple, size: tuple):
+        self._memory[image_path] = (identity, size)
+        self._memory.move_to_end(image_path)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _note_write(self):
+        self._pending_writes += 1
+        if self._pending_writes >= COMMIT_INTERVAL:
+            self._commit()
+
+    def _commit(self):
+        if self._touched:
+            self._db.executemany("UPDATE dimensions SET last_used = ? WHERE path = ?",
+                                 [(clock, path) for path, clock in self._touched.items()])
+            self._touched.clear()
+        self._db.commit()
+        self._pending_writes = 0
+
+    def _evict(self):
+        self._commit()
+        target = int(self.max_entries * 0.9)
+        excess = self._disk_count - target
+        self._db.execute(
+            "DELETE FROM dimensions WHERE path IN "
+            "(SELECT path FROM dimensions ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        self._disk_count = target
+        self.evictions += excess
+        self._commit()
+
+    def flush(self):
+        with self._lock:
+            self._commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            self._db.execute("DELETE FROM dimensions")
+            self._db.commit()
+            self._disk_count = 0
+            self._pending_writes = 0
+
+    def close(self):
+        with self._lock:
+            self._commit()
+            self._db.close()
+
+
+def add_cache_argument(parser: argparse.ArgumentParser):
+    parser.add_argument("--cache", action="store_true", help=f"cache image dimensions in {CACHE_FILE}")
+
+
+@contextmanager
+def cached_probe(enabled: bool = True) -> Iterator[Callable[[str], Dimensions]]:
+    if not enabled:
+        yield get_image_dimensions
+        return
+    with DimensionCache() as cache:
+        yield cache.get_image_dimensions
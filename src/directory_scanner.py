@@ -0,0 +1,105 @@
+import os
+import threading
+from contextlib import closing
+from concurrent.futures import Executor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+from aspect_logic import IMAGE_EXTENSIONS, Dimensions, Ratio, get_image_dimensions, simplify_aspect_ratio
+
+
+class ScanResult(NamedTuple):
+    path: str
+    width: int
+    height: int
+    ratio: Ratio
+
+
+def iter_image_entries(root: str, recursive: bool = True,
+                       cancel_event: threading.Event = None) -> Iterator[os.DirEntry]:
+    stack = [root]
+    while stack:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                stack.append(entry.path)
+                        elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                            yield entry
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def iter_image_files(root: str, recursive: bool = True, cancel_event: threading.Event = None) -> Iterator[str]:
+    for entry in iter_image_entries(root, recursive, cancel_event):
+        yield entry.path
+
+
+def iter_input_files(paths: Iterable[str], recursive: bool = True,
+                     cancel_event: threading.Event = None) -> Iterator[str]:
+    for path in paths:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        if os.path.isdir(path):
+            yield from iter_image_files(path, recursive, cancel_event)
+        else:
+            yield path
+
+
+def scan_directory(root: str, recursive: bool = True, workers: int = None,
+                   progress: Callable[[int, str], None] = None,
+                   cancel_event: threading.Event = None,
+                   probe: Callable[[str], Dimensions] = get_image_dimensions) -> Iterator[ScanResult]:
+    return scan_paths([root], recursive, workers, progress, cancel_event, probe)
+
+
+def scan_paths(paths: Iterable[str], recursive: bool = True, workers: int = None,
+               progress: Callable[[int, str], None] = None,
+               cancel_event: threading.Event = None,
+               probe: Callable[[str], Dimensions] = get_image_dimensions) -> Iterator[ScanResult]:
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+
+    def probe_path(path: str) -> ScanResult:
+        width, height = probe(path)
+        return ScanResult(path, width, height, simplify_aspect_ratio(width, height))
+
+    arguments = ((path,) for path in iter_input_files(paths, recursive, cancel_event))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        with closing(submit_bounded(executor, probe_path, arguments, workers * 4, cancel_event)) as results:
+            for done_count, result in enumerate(results, 1):
+                if progress is not None:
+                    progress(done_count, result.path)
+                yield result
+
+
+def submit_bounded(executor: Executor, func: Callable, arguments: Iterable[tuple], max_pending: int,
+                   cancel_event: threading.Event = None) -> Iterator:
+    # 入力をすべて先に投入するとメモリを使い切るため、未完了のタスクを max_pending 件までに抑え、完了順に返す
+    pending = set()
+    try:
+        for args in arguments:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            pending.add(executor.submit(func, *args))
+            if len(pending) < max_pending:
+                continue
+
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -1,35 +1,87 @@
 import tkinter as tk
 from tkinter import messagebox
 import os
-
-from aspect_logic import simplify_aspect_ratio, calculate_new_dimensions, get_image_dimensions
-from settings_manager import SettingsManager
-from localization_manager import i18n
+import queue
+import threading
+
+import metrics
+from aspect_logic import Ratio, resolve_final_dimensions, get_image_dimensions, simplify_aspect_ratio
+from target_solver import MODE_CONTAIN, SOLVER_MODES, solve_target
+from ratio_engine import describe_ratio
+from archive_paths import is_archive_path
+from settings_manager import SettingsManager, get_settings_store
+from localization_manager import get_i18n
+
+LIVE_DEBOUNCE_MS = 150
+WATCH_POLL_MS = 250
+FIT_MODE_RATIO = "ratio"
+FIT_MODES = (FIT_MODE_RATIO,) + SOLVER_MODES
+ORIGINAL_OUTPUT_KEYS = ("original_ratio", "out_original_w", "out_original_h")
+FINAL_OUTPUT_KEYS = ("final_ratio", "out_final_w", "out_final_h", "out_final_offset")
+RATIO_OUTPUT_KEYS = ("original_ratio", "final_ratio")
+OUTPUT_DEPENDENCIES = {
+    "original_w": ORIGINAL_OUTPUT_KEYS + FINAL_OUTPUT_KEYS,
+    "original_h": ORIGINAL_OUTPUT_KEYS + FINAL_OUTPUT_KEYS,
+    "target_ratio_w": FINAL_OUTPUT_KEYS,
+    "target_ratio_h": FINAL_OUTPUT_KEYS,
+    "target_w": FINAL_OUTPUT_KEYS,
+    "target_h": FINAL_OUTPUT_KEYS,
+}
 
 
 class GuiLogic:
 
-    def __init__(self, master, entries, input_vars, output_entries, settings, previous_inputs, auto_calculate_image_var):
+    def __init__(self, master, entries, input_vars, output_entries, settings, previous_inputs, auto_calculate_image_var,
+                 live_calculate_var=None, watch_folder_var=None, fit_mode_var=None):
         self.master = master
-        self.i18n = i18n
         self.entries = entries
         self.input_vars = input_vars
         self.output_entries = output_entries
         self.settings = settings
         self.previous_inputs = previous_inputs
         self.auto_calculate_image_var = auto_calculate_image_var
-
-    def _save_settings(self, geometry_str, lang_code):
+        self.live_calculate_var = live_calculate_var
+        self.watch_folder_var = watch_folder_var
+        self.fit_mode_var = fit_mode_var
+        self._output_texts = {}
+        self._live_dirty_keys = set()
+        self._live_after_id = None
+        self.busy_indicator = None
+        self._probe_generation = 0
+        self._probe_results = queue.Queue()
+        self._probe_polling = False
+        self._busy = False
+        self._watcher = None
+        self._watch_stop = None
+        self._watch_events = queue.Queue()
+
+    @property
+    def i18n(self):
+        # 計算だけを行う場合に言語ファイルを読み込まないよう、使う時点で取得する
+        return get_i18n()
+
+    def _save_settings(self, geometry_str, lang_code, flush: bool = False):
         settings = self.settings
 
         settings["geometry"] = geometry_str
         settings["language"] = lang_code
         settings["auto_calculate_image"] = self.auto_calculate_image_var.get()
+        if self.live_calculate_var is not None:
+            settings["live_calculate"] = self.live_calculate_var.get()
+        if self.watch_folder_var is not None:
+            settings["watch_folder"] = self.watch_folder_var.get()
+        if self.fit_mode_var is not None:
+            settings["fit_mode"] = self.fit_mode_var.get()
 
         for key, entry in self.entries.items():
             settings[key] = entry.get()
 
-        SettingsManager.save_settings(settings)
+        store = get_settings_store()
+        store.replace(settings)
+        if flush:
+            store.flush()
+        else:
+            store.schedule_flush()
 
     def _get_float_value(self, key: str) -> float:
         try:
@@ -45,19 +97,35 @@ class GuiLogic:
         if entry.winfo_exists() and entry.focus_get() == entry:
             entry.icursor(tk.END)
 
-    def update_output_entry(self, key: str, value: float):
-        entry = self.output_entries[key]
-        entry.config(state='normal')
-        entry.delete(0, tk.END)
-
+    @staticmethod
+    def _format_output(key: str, value) -> str:
+        if key in RATIO_OUTPUT_KEYS:
+            if value is None:
+                return "N/A"
+            if key == "original_ratio":
+                return describe_ratio(value.width, value.height)
+            return str(value)
+        if key == "out_final_offset":
+            if value is None:
+                return ""
+            return ", ".join(GuiLogic._format_output("", part) for part in value)
         if isinstance(value, (int, float)):
             if isinstance(value, float) and value != int(value):
-                entry.insert(0, f"{value:.2f}")
-            else:
-                entry.insert(0, str(int(value)))
-        else:
-            entry.insert(0, str(value) if value is not None else "")
+                return f"{value:.2f}"
+            return str(int(value))
+        return str(value) if value is not None else ""
+
+    @metrics.timed("update_output_entry")
+    def update_output_entry(self, key: str, value):
+        text = self._format_output(key, value)
+        if self._output_texts.get(key) == text:
+            return
+        self._output_texts[key] = text
 
+        entry = self.output_entries[key]
+        entry.config(state='normal')
+        entry.delete(0, tk.END)
+        entry.insert(0, text)
         entry.config(state='readonly')
 
     def auto_save_input(self, key: str):
@@ -67,6 +135,23 @@ class GuiLogic:
         elif key in ["target_ratio_w", "target_ratio_h", "target_w", "target_h"]:
             self.previous_inputs[f"target_{key}"] = value
 
+        if key in OUTPUT_DEPENDENCIES and self.live_calculate_var is not None and self.live_calculate_var.get():
+            self.schedule_live_calculation(key)
+
+    def schedule_live_calculation(self, key: str):
+        self._live_dirty_keys.add(key)
+        if self._live_after_id is not None:
+            self.master.after_cancel(self._live_after_id)
+        self._live_after_id = self.master.after(LIVE_DEBOUNCE_MS, self._run_live_calculation)
+
+    def _run_live_calculation(self):
+        self._live_after_id = None
+        output_keys = set()
+        for key in self._live_dirty_keys:
+            output_keys.update(OUTPUT_DEPENDENCIES[key])
+        self._live_dirty_keys.clear()
+        self.calculate_aspects(output_keys)
+
     def save_current_inputs(self, keys: list[str], prefix: str):
         for key in keys:
             if key in self.entries:
@@ -95,19 +180,151 @@ class GuiLogic:
 
     def calculate_image_dimensions(self):
         image_path = self.entries["image_path"].get()
-        if not image_path or not os.path.exists(image_path):
+        if not image_path:
+            messagebox.showerror(self.i18n.get_string("title"), self.i18n.get_string("error_file_path"))
+            return
+
+        if is_archive_path(image_path):
+            self.show_archive_dimensions(image_path)
+            return
+
+        self._probe_generation += 1
+        generation = self._probe_generation
+        threading.Thread(target=self._probe_image, args=(generation, image_path), daemon=True).start()
+
+        self._set_busy(True)
+        if not self._probe_polling:
+            self._probe_polling = True
+            self.master.after(20, self._poll_probe_results)
+
+    def show_archive_dimensions(self, archive_path: str):
+        if not os.path.isfile(archive_path):
             messagebox.showerror(self.i18n.get_string("title"), self.i18n.get_string("error_file_path"))
             return
 
+        # tarfile / zipfile は起動時に読み込まないよう、アーカイブを開くときに import する
+        from archive_probe import probe_archive
+        from results_window import ResultsWindow
+
+        window = ResultsWindow(self.master, self.i18n,
+                               f"{self.i18n.get_string('archive_contents')} - {os.path.basename(archive_path)}")
+        window.feed(probe_archive(archive_path))
+
+    def show_batch_results(self, paths: list[str]):
+        from directory_scanner import scan_paths
+        from results_window import ResultsWindow
+
+        window = ResultsWindow(self.master, self.i18n, self.i18n.get_string("batch_results"))
+        window.feed(scan_paths(paths, cancel_event=window.cancel_event))
+
+    def cancel_image_probe(self):
+        self._probe_generation += 1
+        self._set_busy(False)
+
+    def _probe_image(self, generation: int, image_path: str):
+        if generation != self._probe_generation:
+            return
+        if not os.path.isfile(image_path):
+            self._probe_results.put((generation, "error_file_path", None, None))
+            return
+
         width, height = get_image_dimensions(image_path)
+        status = "ok" if width is not None and height is not None else "error_image_load"
+        self._probe_results.put((generation, status, width, height))
+
+    def _poll_probe_results(self):
+        while True:
+            try:
+                generation, status, width, height = self._probe_results.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._probe_generation:
+                continue
+
+            self._set_busy(False)
+            if status == "ok":
+                self.update_input_entry("original_w", width)
+                self.update_input_entry("original_h", height)
+            else:
+                messagebox.showerror(self.i18n.get_string("title"), self.i18n.get_string(status))
 
-        if width is not None and height is not None:
-            self.update_input_entry("original_w", width)
-            self.update_input_entry("original_h", height)
+        if self._busy:
+            self.master.after(20, self._poll_probe_results)
         else:
-            messagebox.showerror(self.i18n.get_string("title"), self.i18n.get_string("error_image_load"))
+            self._probe_polling = False
 
-    def calculate_aspects(self):
+    def update_folder_watch(self):
+        folder = None
+        if self.watch_folder_var is not None and self.watch_folder_var.get():
+            image_path = self.entries["image_path"].get().strip()
+            folder = image_path if os.path.isdir(image_path) else os.path.dirname(image_path)
+            if not folder or not os.path.isdir(folder):
+                folder = None
+
+        if self._watcher is not None and folder is not None and self._watcher.root == os.path.abspath(folder):
+            return
+        self.stop_folder_watch()
+        if folder is None:
+            return
+
+        from watch_folder import DEFAULT_INTERVAL, FolderWatcher
+
+        watcher = FolderWatcher(folder, recursive=False)
+        stop_event = threading.Event()
+        self._watcher = watcher
+        self._watch_stop = stop_event
+
+        def run():
+            baseline = not watcher.entries
+            try:
+                if baseline:
+                    watcher.poll()
+                    stop_event.wait(DEFAULT_INTERVAL)
+                watcher.run(lambda event: self._watch_events.put((stop_event, event)), stop_event, DEFAULT_INTERVAL)
+            except Exception as e:
+                print(f"警告: フォルダ監視を停止しました ({folder}): {e}")
+        threading.Thread(target=run, daemon=True).start()
+        self.master.after(WATCH_POLL_MS, self._poll_watch_events, stop_event)
+
+    def stop_folder_watch(self):
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+        self._watcher = None
+        self._watch_stop = None
+
+    def _poll_watch_events(self, stop_event: threading.Event):
+        # フォルダを切り替えるたびにポーリングが増えないよう、古い監視のループはここで終える
+        if stop_event is not self._watch_stop:
+            return
+        latest = None
+        while True:
+            try:
+                event_stop, event = self._watch_events.get_nowait()
+            except queue.Empty:
+                break
+            if event_stop is stop_event and event.kind != "removed" and event.width is not None:
+                latest = event
+
+        if latest is not None:
+            self.update_input_entry("image_path", latest.path)
+            if self.auto_calculate_image_var.get():
+                self.update_input_entry("original_w", latest.width)
+                self.update_input_entry("original_h", latest.height)
+        self.master.after(WATCH_POLL_MS, self._poll_watch_events, stop_event)
+
+    def _set_busy(self, busy: bool):
+        self._busy = busy
+        if self.busy_indicator is None:
+            return
+        if busy:
+            self.busy_indicator.grid()
+            self.busy_indicator.start(10)
+        else:
+            self.busy_indicator.stop()
+            self.busy_indicator.grid_remove()
+
+    @metrics.timed("calculate_aspects")
+    def calculate_aspects(self, output_keys=None):
         orig_w = self._get_float_value("original_w")
         orig_h = self._get_float_value("original_h")
 
@@ -117,68 +334,39 @@ class GuiLogic:
         target_w = self._get_float_value("target_w")
         target_h = self._get_float_value("target_h")
 
-        original_ratio = simplify_aspect_ratio(orig_w, orig_h)
-        final_ratio = original_ratio
-        final_w = orig_w
-        final_h = orig_h
-
-        target_ratio_str = None
-        if target_ratio_w_val is not None and target_ratio_h_val is not None and target_ratio_w_val > 0 and target_ratio_h_val > 0:
-            r_w_str = str(int(target_ratio_w_val)) if target_ratio_w_val == int(target_ratio_w_val) else str(target_ratio_w_val)
-            r_h_str = str(int(target_ratio_h_val)) if target_ratio_h_val == int(target_ratio_h_val) else str(target_ratio_h_val)
-            target_ratio_str = f"{r_w_str}:{r_h_str}"
-            final_ratio = target_ratio_str
-
-        if target_ratio_str:
-            if target_w is not None and target_h is not None:
-                if target_w >= target_h:
-                    calculated_w, calculated_h = calculate_new_dimensions(target_ratio_str, target_w, None)
-                else:
-                    calculated_w, calculated_h = calculate_new_dimensions(target_ratio_str, None, target_h)
-                final_w = calculated_w
-                final_h = calculated_h
-
-            elif target_w is not None:
-                calculated_w, calculated_h = calculate_new_dimensions(target_ratio_str, target_w, None)
-                final_w = calculated_w
-                final_h = calculated_h
-
-            elif target_h is not None:
-                calculated_w, calculated_h = calculate_new_dimensions(target_ratio_str, None, target_h)
-                final_w = calculated_w
-                final_h = calculated_h
-
-            elif orig_w is not None and orig_h is not None:
-                calculated_w, calculated_h = calculate_new_dimensions(target_ratio_str, None, None, orig_w, orig_h)
-                final_w = calculated_w
-                final_h = calculated_h
-
-            elif orig_w is None and orig_h is None:
-                pass
+        original_ratio, final_ratio, final_w, final_h = resolve_final_dimensions(
+            orig_w, orig_h, target_ratio_w_val, target_ratio_h_val, target_w, target_h
+        )
 
-        else:
-            final_ratio = original_ratio
-
-            if original_ratio != "N/A" and (target_h is not None or target_w is not None):
-                if target_w is not None and target_h is not None:
-                    if target_w >= target_h:
-                        calculated_w, calculated_h = calculate_new_dimensions(original_ratio, target_w, None)
-                    else:
-                        calculated_w, calculated_h = calculate_new_dimensions(original_ratio, None, target_h)
-                else:
-                    calculated_w, calculated_h = calculate_new_dimensions(original_ratio, target_w, target_h)
-
-                final_w = calculated_w
-                final_h = calculated_h
-
-            elif original_ratio != "N/A":
-                final_w = orig_w
-                final_h = orig_h
-
-        self.update_output_entry("original_ratio", original_ratio)
-        self.update_output_entry("out_original_w", orig_w)
-        self.update_output_entry("out_original_h", orig_h)
-
-        self.update_output_entry("final_ratio", final_ratio)
-        self.update_output_entry("out_final_w", final_w)
-        self.update_output_entry("out_final_h", final_h)
+        offset = None
+        fit_mode = self.fit_mode_var.get() if self.fit_mode_var is not None else FIT_MODE_RATIO
+        if fit_mode in SOLVER_MODES and (target_w is not None or target_h is not None):
+            if (target_ratio_w_val is not None and target_ratio_h_val is not None
+                    and target_ratio_w_val > 0 and target_ratio_h_val > 0):
+                source_w, source_h = target_ratio_w_val, target_ratio_h_val
+            else:
+                source_w, source_h = orig_w, orig_h
+            solution = solve_target(source_w, source_h, target_w, target_h, fit_mode)
+            if solution is not None:
+                # cover / pad では枠 (canvas) ではなく、縮尺後の画像サイズと枠内での位置を表示する
+                final_w, final_h = solution.width, solution.height
+                offset = (solution.offset_x, solution.offset_y)
+                if fit_mode != MODE_CONTAIN:
+                    final_ratio = simplify_aspect_ratio(final_w, final_h)
+
+        if original_ratio is not None:
+            # 表示時に describe_ratio で正確に約分できるよう、丸める前の寸法を渡す
+            original_ratio = Ratio(orig_w, orig_h)
+
+        outputs = {
+            "original_ratio": original_ratio,
+            "out_original_w": orig_w,
+            "out_original_h": orig_h,
+            "final_ratio": final_ratio,
+            "out_final_w": final_w,
+            "out_final_h": final_h,
+            "out_final_offset": offset,
+        }
+        for key, value in outputs.items():
+            if output_keys is None or key in output_keys:
+                self.update_output_entry(key, value)
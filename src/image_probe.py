@@ -0,0 +1,247 @@
+import struct
+from typing import NamedTuple
+
+HEADER_SIZE = 32
+EXIF_PREFIX_SIZE = 1024
+MAX_PNG_EXIF_SIZE = 65536
+
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+_JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xDA)) | {0x01}
+_JPEG_APP0 = 0xE0
+_JPEG_APP1 = 0xE1
+
+_TIFF_ORIENTATION = 0x0112
+_TIFF_X_RESOLUTION = 0x011A
+_TIFF_Y_RESOLUTION = 0x011B
+_TIFF_RESOLUTION_UNIT = 0x0128
+_TIFF_SHORT = 3
+_TIFF_RATIONAL = 5
+_INCHES_PER_METER = 0.0254
+_PNG_FIRST_CHUNK_END = 33
+
+
+class ImageInfo(NamedTuple):
+    width: int
+    height: int
+    orientation: int = 1
+    dpi: tuple = None
+
+
+def apply_orientation(width: int, height: int, orientation: int, dpi: tuple) -> ImageInfo:
+    if orientation >= 5:
+        width, height = height, width
+        if dpi is not None:
+            dpi = (dpi[1], dpi[0])
+    return ImageInfo(width, height, orientation, dpi)
+
+
+def _parse_tiff(data: bytes) -> tuple[int, tuple]:
+    if len(data) < 8 or data[:2] not in (b'II', b'MM'):
+        return 1, None
+    endian = '<' if data[:2] == b'II' else '>'
+    ifd_offset = struct.unpack(endian + 'I', data[4:8])[0]
+    if ifd_offset + 2 > len(data):
+        return 1, None
+
+    orientation = 1
+    resolution = {}
+    unit = 2
+    count = struct.unpack(endian + 'H', data[ifd_offset:ifd_offset + 2])[0]
+    for index in range(count):
+        offset = ifd_offset + 2 + index * 12
+        if offset + 12 > len(data):
+            break
+        tag, value_type = struct.unpack(endian + 'HH', data[offset:offset + 4])
+        if value_type == _TIFF_SHORT and tag in (_TIFF_ORIENTATION, _TIFF_RESOLUTION_UNIT):
+            value = struct.unpack(endian + 'H', data[offset + 8:offset + 10])[0]
+            if tag == _TIFF_ORIENTATION:
+                orientation = value if 1 <= value <= 8 else 1
+            else:
+                unit = value
+        elif value_type == _TIFF_RATIONAL and tag in (_TIFF_X_RESOLUTION, _TIFF_Y_RESOLUTION):
+            value_offset = struct.unpack(endian + 'I', data[offset + 8:offset + 12])[0]
+            if value_offset + 8 <= len(data):
+                numerator, denominator = struct.unpack(endian + 'II', data[value_offset:value_offset + 8])
+                if denominator:
+                    resolution[tag] = numerator / denominator
+
+    dpi = None
+    if _TIFF_X_RESOLUTION in resolution and _TIFF_Y_RESOLUTION in resolution and unit in (2, 3):
+        scale = 2.54 if unit == 3 else 1.0
+        dpi = (resolution[_TIFF_X_RESOLUTION] * scale, resolution[_TIFF_Y_RESOLUTION] * scale)
+    return orientation, dpi
+
+
+def _probe_png(head: bytes, f) -> ImageInfo:
+    if len(head) < 24 or head[12:16] != b'IHDR':
+        return None
+    width, height = struct.unpack('>II', head[16:24])
+
+    orientation = 1
+    dpi = None
+    reader = _HeadReader(head, f, 0)
+    reader.skip(_PNG_FIRST_CHUNK_END)
+    while True:
+        chunk_header = reader.read(8)
+        if len(chunk_header) < 8:
+            break
+        length, chunk_type = struct.unpack('>I4s', chunk_header)
+        if chunk_type in (b'IDAT', b'IEND'):
+            break
+        if chunk_type == b'pHYs' and length == 9:
+            data = reader.read(9)
+            if len(data) == 9 and data[8] == 1:
+                ppu_x, ppu_y = struct.unpack('>II', data[:8])
+                dpi = (ppu_x * _INCHES_PER_METER, ppu_y * _INCHES_PER_METER)
+            reader.skip(4)
+        elif chunk_type == b'eXIf' and length <= MAX_PNG_EXIF_SIZE:
+            orientation, exif_dpi = _parse_tiff(reader.read(length))
+            dpi = dpi or exif_dpi
+            reader.skip(4)
+        else:
+            reader.skip(length + 4)
+    return apply_orientation(width, height, orientation, dpi)
+
+
+def _probe_gif(head: bytes) -> ImageInfo:
+    if len(head) >= 10:
+        return ImageInfo(*struct.unpack('<HH', head[6:10]))
+    return None
+
+
+def _probe_bmp(head: bytes) -> ImageInfo:
+    if len(head) < 26:
+        return None
+    dib_size = struct.unpack('<I', head[14:18])[0]
+    if dib_size == 12:
+        return ImageInfo(*struct.unpack('<HH', head[18:22]))
+    width, height = struct.unpack('<ii', head[18:26])
+    return ImageInfo(abs(width), abs(height))
+
+
+def _probe_webp(head: bytes) -> ImageInfo:
+    if len(head) < 30:
+        return None
+    chunk = head[12:16]
+    if chunk == b'VP8 ':
+        if head[23:26] != b'\x9d\x01\x2a':
+            return None
+        width, height = struct.unpack('<HH', head[26:30])
+        return ImageInfo(width & 0x3FFF, height & 0x3FFF)
+    if chunk == b'VP8L':
+        if head[20] != 0x2F:
+            return None
+        bits = struct.unpack('<I', head[21:25])[0]
+        return ImageInfo((bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+    if chunk == b'VP8X':
+        width = int.from_bytes(head[24:27], 'little') + 1
+        height = int.from_bytes(head[27:30], 'little') + 1
+        return ImageInfo(width, height)
+    return None
+
+
+class _HeadReader:
+
+    def __init__(self, head: bytes, f, position: int):
+        self.head = head
+        self.f = f
+        self.position = position
+
+    def read(self, size: int) -> bytes:
+        if self.position < len(self.head):
+            data = self.head[self.position:self.position + size]
+            self.position += len(data)
+            if len(data) < size:
+                data += self.f.read(size - len(data))
+            return data
+        return self.f.read(size)
+
+    def skip(self, size: int):
+        remaining = len(self.head) - self.position
+        if size <= remaining:
+            self.position += size
+            return
+        self.position = len(self.head)
+        self.f.seek(size - remaining, 1)
+
+
+def _read_jfif_density(data: bytes) -> tuple:
+    if len(data) < 12 or not data.startswith(b'JFIF\x00'):
+        return None
+    unit = data[7]
+    x_density, y_density = struct.unpack('>HH', data[8:12])
+    if unit not in (1, 2) or not x_density or not y_density:
+        return None
+    scale = 2.54 if unit == 2 else 1.0
+    return (x_density * scale, y_density * scale)
+
+
+def _probe_jpeg(reader: _HeadReader) -> ImageInfo:
+    orientation = 1
+    dpi = None
+    exif_dpi = None
+    while True:
+        byte = reader.read(1)
+        if not byte:
+            return None
+        if byte != b'\xff':
+            continue
+
+        marker = reader.read(1)
+        while marker == b'\xff':
+            marker = reader.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+
+        if marker in _JPEG_STANDALONE_MARKERS or marker == 0x00:
+            continue
+        if marker == 0xD9:
+            return None
+
+        length_bytes = reader.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+
+        if marker in _JPEG_SOF_MARKERS:
+            data = reader.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack('>HH', data[1:5])
+            return apply_orientation(width, height, orientation, exif_dpi or dpi)
+
+        if marker in (_JPEG_APP0, _JPEG_APP1) and length > 2:
+            size = min(length - 2, EXIF_PREFIX_SIZE)
+            data = reader.read(size)
+            if marker == _JPEG_APP0:
+                dpi = dpi or _read_jfif_density(data)
+            elif data.startswith(b'Exif\x00\x00'):
+                orientation, exif_dpi = _parse_tiff(data[6:])
+            reader.skip(length - 2 - size)
+            continue
+
+        reader.skip(length - 2)
+
+
+def probe_image_info(f) -> ImageInfo:
+    head = f.read(HEADER_SIZE)
+
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return _probe_png(head, f)
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return _probe_gif(head)
+    if head.startswith(b'BM'):
+        return _probe_bmp(head)
+    if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+        return _probe_webp(head)
+    if head.startswith(b'\xff\xd8'):
+        return _probe_jpeg(_HeadReader(head, f, 2))
+    return None
+
+
+def probe_stream(f) -> tuple[int, int]:
+    info = probe_image_info(f)
+    if info is None:
+        return None
+    return info.width, info.height
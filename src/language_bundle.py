@@ -0,0 +1,134 @@
+import json
+import os
+import pickle
+import struct
+import sys
+
+import metrics
+from settings_manager import write_atomic
+
+BUNDLE_FILE = 'user/language_bundle.pickle'
+BUNDLE_VERSION = 1
+_HEADER_LENGTH = struct.Struct('<Q')
+
+
+class StringTable(dict):
+
+    __slots__ = ()
+
+    def __missing__(self, key: str) -> str:
+        if metrics.enabled:
+            metrics.increment("get_string_fallback", outcome="missing")
+        return f"<{key}>"
+
+
+def source_signature(lang_folder: str) -> tuple:
+    entries = []
+    with os.scandir(lang_folder) as it:
+        for entry in it:
+            if entry.name.endswith(".json") and entry.is_file():
+                st = entry.stat()
+                entries.append((entry.name, st.st_size, st.st_mtime_ns))
+    return (os.path.abspath(lang_folder), tuple(sorted(entries)))
+
+
+def read_language_file(filepath: str) -> dict:
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, FileNotFoundError) as e:
+        print(f"エラー: 言語ファイル '{filepath}' のロードに失敗しました: {e}")
+        return {}
+
+
+def _merge_with_default(strings: dict, default_strings: dict) -> StringTable:
+    table = StringTable((key, value) for key, value in default_strings.items() if value)
+    table.update((key, value) for key, value in strings.items() if value)
+    return table
+
+
+class LanguageBundle:
+
+    def __init__(self, names: dict, offsets: dict, bundle_path: str, data_start: int, tables: dict = None):
+        self.names = names
+        self.offsets = offsets
+        self.bundle_path = bundle_path
+        self.data_start = data_start
+        self.tables = tables or {}
+        self.codes = set(names)
+        self.index = {name: code for code, name in names.items()}
+
+    def load_table(self, lang_code: str) -> StringTable:
+        table = self.tables.get(lang_code)
+        if table is not None:
+            return table
+
+        offset, length = self.offsets[lang_code]
+        with open(self.bundle_path, 'rb') as f:
+            f.seek(self.data_start + offset)
+            table = pickle.loads(f.read(length))
+        self.tables[lang_code] = table
+        return table
+
+    @classmethod
+    def load(cls, lang_folder: str, bundle_path: str = None, default_code: str = "en") -> "LanguageBundle":
+        bundle_path = bundle_path or BUNDLE_FILE
+        signature = source_signature(lang_folder)
+
+        try:
+            with open(bundle_path, 'rb') as f:
+                header_length = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))[0]
+                header = pickle.loads(f.read(header_length))
+            if (header.get("version") == BUNDLE_VERSION and header.get("signature") == signature
+                    and header.get("default_code") == default_code):
+                return cls(header["names"], header["offsets"], bundle_path, _HEADER_LENGTH.size + header_length)
+        except (OSError, struct.error, pickle.UnpicklingError, EOFError, AttributeError, TypeError):
+            pass
+
+        return compile_bundle(lang_folder, bundle_path, default_code, signature)
+
+
+def compile_bundle(lang_folder: str, bundle_path: str = None, default_code: str = "en",
+                   signature: tuple = None) -> LanguageBundle:
+    bundle_path = bundle_path or BUNDLE_FILE
+    signature = signature or source_signature(lang_folder)
+
+    sources = {}
+    for filename, _, _ in signature[1]:
+        sources[filename[:-5].lower()] = read_language_file(os.path.join(lang_folder, filename))
+
+    default_strings = sources.get(default_code, {})
+    tables = {code: _merge_with_default(strings, default_strings) for code, strings in sources.items()}
+    names = {code: strings.get("language_name", code) for code, strings in sources.items()}
+
+    blobs = {code: pickle.dumps(table, protocol=pickle.HIGHEST_PROTOCOL) for code, table in tables.items()}
+    offsets = {}
+    position = 0
+    for code, blob in blobs.items():
+        offsets[code] = (position, len(blob))
+        position += len(blob)
+
+    header_bytes = pickle.dumps({
+        "version": BUNDLE_VERSION,
+        "signature": signature,
+        "default_code": default_code,
+        "names": names,
+        "offsets": offsets,
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+    data_start = _HEADER_LENGTH.size + len(header_bytes)
+
+    try:
+        write_atomic(
+            bundle_path, _HEADER_LENGTH.pack(len(header_bytes)) + header_bytes + b"".join(blobs.values())
+        )
+    except OSError as e:
+        print(f"警告: 言語バンドルを保存できませんでした ({bundle_path}): {e}")
+
+    return LanguageBundle(names, offsets, bundle_path, data_start, tables)
+
+
+if __name__ == "__main__":
+    folder = sys.argv[1] if len(sys.argv) > 1 else "language"
+    output = sys.argv[2] if len(sys.argv) > 2 else BUNDLE_FILE
+    bundle = compile_bundle(folder, output)
+    print(f"{output}: {len(bundle.codes)} languages")
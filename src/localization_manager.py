@@ -1,56 +1,40 @@
 import os
-import json
 import locale
-import difflib
 
+from language_bundle import LanguageBundle, StringTable
 from settings_manager import SettingsManager
 
 
 class LocalizationManager:
 
-    def __init__(self, lang_folder: str = "language", default_code: str = "en"):
+    def __init__(self, lang_folder: str = "language", default_code: str = "en", bundle_file_path: str = None):
         self.lang_folder = lang_folder
         self.default_code = default_code
-        self.available_codes = self._get_available_language_codes()
+        self.bundle = self._load_bundle(bundle_file_path)
+        self.available_codes = set(self.bundle.codes)
         self.loaded_data = {}
         self.current_code = self._get_initial_language_code()
         self.current_strings = self._load_language_data(self.current_code)
 
-    def _get_available_language_codes(self) -> set:
-        codes = set()
+    def _load_bundle(self, bundle_file_path: str) -> LanguageBundle:
         if not os.path.exists(self.lang_folder):
             print(f"警告: 言語フォルダ '{self.lang_folder}' が見つかりません。")
-            return codes
+            return LanguageBundle({}, {}, bundle_file_path, 0)
+        return LanguageBundle.load(self.lang_folder, bundle_file_path, self.default_code)
 
-        for filename in os.listdir(self.lang_folder):
-            if filename.endswith(".json"):
-                lang_code = filename[:-5].lower()
-                codes.add(lang_code)
-
-        return codes
-
-    def _load_language_data(self, lang_code: str) -> dict:
+    def _load_language_data(self, lang_code: str) -> StringTable:
         if lang_code in self.loaded_data:
             return self.loaded_data[lang_code]
 
         if lang_code not in self.available_codes:
             if self.default_code in self.available_codes:
                 return self._load_language_data(self.default_code)
-            return {}
+            return StringTable()
 
-        data = self._load_language_data_from_file(lang_code)
+        data = self.bundle.load_table(lang_code)
         self.loaded_data[lang_code] = data
         return data
 
-    def _load_language_data_from_file(self, lang_code: str) -> dict:
-        filepath = os.path.join(self.lang_folder, f"{lang_code}.json")
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError) as e:
-            print(f"エラー: 言語ファイル '{filepath}' のロードに失敗しました: {e}")
-            return {}
-
     def _get_os_language_code_candidates(self) -> list:
         candidates = []
         try:
@@ -74,6 +58,8 @@ class LocalizationManager:
     def _calculate_match_score(self, os_code: str, available_code: str) -> float:
         if not os_code or not available_code:
             return 0.0
+        import difflib
+
         s = difflib.SequenceMatcher(None, os_code, available_code)
         return s.ratio()
 
@@ -118,12 +104,10 @@ class LocalizationManager:
         return self.default_code
 
     def get_available_languages(self) -> dict:
-        lang_map = {}
-        for code in self.available_codes:
-            data = self._load_language_data(code)
-            lang_map[data.get("language_name", code)] = code
+        return dict(self.bundle.index)
 
-        return lang_map
+    def get_language_name(self, lang_code: str) -> str:
+        return self.bundle.names.get(lang_code, lang_code)
 
     def set_language(self, lang_code: str) -> bool:
         if lang_code in self.available_codes:
@@ -133,11 +117,19 @@ class LocalizationManager:
         return False
 
     def get_string(self, key: str) -> str:
-        default_strings_en = self.loaded_data.get(self.default_code)
-        if default_strings_en is None and self.default_code in self.available_codes:
-            default_strings_en = self._load_language_data(self.default_code)
-
-        return (self.current_strings.get(key) or
-                (default_strings_en or {}).get(key) or
-                f"<{key}>")
-i18n = LocalizationManager()
+        return self.current_strings[key]
+_i18n = None
+
+
+def get_i18n() -> LocalizationManager:
+    global _i18n
+    if _i18n is None:
+        _i18n = LocalizationManager()
+    return _i18n
+
+
+def __getattr__(name: str):
+    if name == "i18n":
+        return get_i18n()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
@@ -0,0 +1,178 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+METRICS_ENV = "ASPECT_METRICS"
+PROMETHEUS_PREFIX = "aspect_calc_"
+BUCKETS_SECONDS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+enabled = False
+output_path = None
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+
+
+class Histogram:
+
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_SECONDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        index = 0
+        for bound in BUCKETS_SECONDS:
+            if seconds <= bound:
+                break
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return (name, tuple(sorted(labels.items())))
+
+
+def enable(path: str = None):
+    global enabled, output_path
+    enabled = True
+    if path:
+        output_path = path
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def observe(name: str, seconds: float, **labels):
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+
+def increment(name: str, amount: int = 1, **labels):
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def timed(name: str):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def snapshot() -> dict:
+    with _lock:
+        histograms = [
+            {
+                "name": name,
+                "labels": dict(labels),
+                "count": histogram.count,
+                "sum_seconds": histogram.sum,
+                "buckets": {str(bound): count for bound, count in zip(BUCKETS_SECONDS + ("+Inf",), histogram.counts)},
+            }
+            for (name, labels), histogram in sorted(_histograms.items())
+        ]
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+    return {"histograms": histograms, "counters": counters}
+
+
+def _format_labels(labels: dict, extra: dict = None) -> str:
+    items = dict(labels)
+    if extra:
+        items.update(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items.items()) + "}"
+
+
+def to_prometheus() -> str:
+    data = snapshot()
+    lines = []
+    declared = set()
+
+    for histogram in data["histograms"]:
+        metric = PROMETHEUS_PREFIX + histogram["name"] + "_seconds"
+        if metric not in declared:
+            lines.append(f"# TYPE {metric} histogram")
+            declared.add(metric)
+        cumulative = 0
+        for bound, count in histogram["buckets"].items():
+            cumulative += count
+            lines.append(f"{metric}_bucket{_format_labels(histogram['labels'], {'le': bound})} {cumulative}")
+        lines.append(f"{metric}_sum{_format_labels(histogram['labels'])} {histogram['sum_seconds']}")
+        lines.append(f"{metric}_count{_format_labels(histogram['labels'])} {histogram['count']}")
+
+    for counter in data["counters"]:
+        metric = PROMETHEUS_PREFIX + counter["name"] + "_total"
+        if metric not in declared:
+            lines.append(f"# TYPE {metric} counter")
+            declared.add(metric)
+        lines.append(f"{metric}{_format_labels(counter['labels'])} {counter['value']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def dump(path: str = None, fmt: str = None) -> str:
+    path = path or output_path
+    if not path:
+        return None
+    fmt = fmt or ("prometheus" if path.endswith((".prom", ".txt")) else "json")
+    text = to_prometheus() if fmt == "prometheus" else json.dumps(snapshot(), indent=4)
+
+    try:
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    except OSError as e:
+        print(f"エラー: メトリクスの書き出しに失敗しました ({path}): {e}")
+        return None
+    return path
+
+
+def _dump_at_exit():
+    if enabled and output_path:
+        dump()
+
+
+if os.environ.get(METRICS_ENV):
+    enable(os.environ[METRICS_ENV])
+
+atexit.register(_dump_at_exit)
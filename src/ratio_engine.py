@@ -0,0 +1,253 @@
+import bisect
+import itertools
+import math
+from fractions import Fraction
+from typing import Iterator, NamedTuple
+
+STANDARD_RATIOS = (
+    ("1:1", 1, 1),
+    ("5:4", 5, 4),
+    ("4:3", 4, 3),
+    ("3:2", 3, 2),
+    ("16:10", 16, 10),
+    ("5:3", 5, 3),
+    ("16:9", 16, 9),
+    ("1.85:1", 37, 20),
+    ("2:1", 2, 1),
+    ("21:9", 21, 9),
+    ("2.39:1", 239, 100),
+    ("32:9", 32, 9),
+    ("4:5", 4, 5),
+    ("3:4", 3, 4),
+    ("2:3", 2, 3),
+    ("10:16", 10, 16),
+    ("9:16", 9, 16),
+    ("1:2", 1, 2),
+    ("9:21", 9, 21),
+)
+
+_STANDARD_INDEX = sorted((w / h, label, w, h) for label, w, h in STANDARD_RATIOS)
+STANDARD_VALUES = [entry[0] for entry in _STANDARD_INDEX]
+STANDARD_LABELS = [entry[1] for entry in _STANDARD_INDEX]
+
+DEFAULT_TOLERANCE = 0.01
+
+
+class StandardMatch(NamedTuple):
+    label: str
+    width: int
+    height: int
+    error: float
+
+
+class Resolution(NamedTuple):
+    width: int
+    height: int
+
+
+def _to_fraction(value) -> Fraction:
+    if isinstance(value, (int, Fraction)):
+        return Fraction(value)
+    return Fraction(repr(float(value)))
+
+
+def exact_ratio(width, height) -> tuple[int, int]:
+    if width is None or height is None or width <= 0 or height <= 0:
+        return None
+    if isinstance(width, int) and isinstance(height, int):
+        divisor = math.gcd(width, height)
+        return width // divisor, height // divisor
+    if isinstance(width, float) and isinstance(height, float) and width.is_integer() and height.is_integer():
+        w, h = int(width), int(height)
+        divisor = math.gcd(w, h)
+        return w // divisor, h // divisor
+
+    ratio = _to_fraction(width) / _to_fraction(height)
+    return ratio.numerator, ratio.denominator
+
+
+def continued_fraction(value: Fraction) -> list[int]:
+    terms = []
+    num, den = value.numerator, value.denominator
+    while den:
+        quotient, remainder = divmod(num, den)
+        terms.append(quotient)
+        num, den = den, remainder
+    return terms
+
+
+def best_approximations(width, height, max_denominator: int = 32) -> list[tuple[int, int]]:
+    ratio = exact_ratio(width, height)
+    if ratio is None:
+        return []
+
+    value = Fraction(*ratio)
+    approximations = []
+    best_error = None
+    p_prev, q_prev = 0, 1
+    p, q = 1, 0
+    for index, term in enumerate(continued_fraction(value)):
+        start = term if index == 0 else max(1, (term + 1) // 2)
+        for semi in range(start, term + 1):
+            p_semi = semi * p + p_prev
+            q_semi = semi * q + q_prev
+            if q_semi > max_denominator:
+                return approximations
+            if p_semi == 0:
+                continue
+            error = abs(Fraction(p_semi, q_semi) - value)
+            if best_error is None or error < best_error:
+                # 1:1 の次に 2:1 のように同じ分母でより近い値が来たら置き換える
+                if approximations and approximations[-1][1] == q_semi:
+                    approximations.pop()
+                approximations.append((p_semi, q_semi))
+                best_error = error
+        p_prev, q_prev, p, q = p, q, term * p + p_prev, term * q + q_prev
+    return approximations
+
+
+def nearest_standard_ratio(width, height, tolerance: float = DEFAULT_TOLERANCE) -> StandardMatch:
+    if width is None or height is None or width <= 0 or height <= 0:
+        return None
+
+    value = width / height
+    index = bisect.bisect_left(STANDARD_VALUES, value)
+    best = None
+    for candidate in (index - 1, index):
+        if 0 <= candidate < len(STANDARD_VALUES):
+            error = abs(value - STANDARD_VALUES[candidate]) / STANDARD_VALUES[candidate]
+            if best is None or error < best[1]:
+                best = (candidate, error)
+
+    candidate, error = best
+    if error > tolerance:
+        return None
+    _, label, w, h = _STANDARD_INDEX[candidate]
+    return StandardMatch(label, w, h, error)
+
+
+def describe_ratio(width, height, tolerance: float = DEFAULT_TOLERANCE) -> str:
+    ratio = exact_ratio(width, height)
+    if ratio is None:
+        return "N/A"
+
+    text = f"{ratio[0]}:{ratio[1]}"
+    match = nearest_standard_ratio(width, height, tolerance)
+    if match is not None and match.error > 0:
+        text += f" (≈{match.label})"
+    return text
+
+
+def resolution_step(ratio_w, ratio_h, alignment: int = 1) -> tuple[int, int, int]:
+    ratio = exact_ratio(ratio_w, ratio_h)
+    if ratio is None or alignment < 1:
+        return None
+    p, q = ratio
+    step = math.lcm(alignment // math.gcd(alignment, p), alignment // math.gcd(alignment, q))
+    return p, q, step
+
+
+def _ceil_div(a, b) -> int:
+    return -(-a // b)
+
+
+def _multiplier_bounds(p: int, q: int, min_width=None, max_width=None, min_height=None, max_height=None,
+                       min_megapixels=None, max_megapixels=None) -> tuple[int, int]:
+    low = 1
+    high = None
+
+    def lower(value):
+        nonlocal low
+        low = max(low, value)
+
+    def upper(value):
+        nonlocal high
+        high = value if high is None else min(high, value)
+
+    if min_width is not None:
+        lower(math.ceil(_to_fraction(min_width) / p))
+    if min_height is not None:
+        lower(math.ceil(_to_fraction(min_height) / q))
+    if max_width is not None:
+        upper(math.floor(_to_fraction(max_width) / p))
+    if max_height is not None:
+        upper(math.floor(_to_fraction(max_height) / q))
+    if min_megapixels is not None:
+        area = math.ceil(_to_fraction(min_megapixels) * 1_000_000 / (p * q))
+        root = math.isqrt(area)
+        lower(root if root * root == area else root + 1)
+    if max_megapixels is not None:
+        area = math.floor(_to_fraction(max_megapixels) * 1_000_000 / (p * q))
+        upper(math.isqrt(area) if area > 0 else 0)
+    return low, high
+
+
+def iter_resolutions(ratio_w, ratio_h, alignment: int = 1, min_width=None, max_width=None,
+                     min_height=None, max_height=None, min_megapixels=None, max_megapixels=None,
+                     descending: bool = False) -> Iterator[Resolution]:
+    params = resolution_step(ratio_w, ratio_h, alignment)
+    if params is None:
+        return
+    p, q, step = params
+    low, high = _multiplier_bounds(p, q, min_width, max_width, min_height, max_height,
+                                   min_megapixels, max_megapixels)
+
+    first = _ceil_div(low, step) * step
+    if high is None:
+        if descending:
+            raise ValueError("descending enumeration needs an upper bound")
+        multipliers = itertools.count(first, step)
+    elif descending:
+        multipliers = range(high // step * step, first - 1, -step)
+    else:
+        multipliers = range(first, high + 1, step)
+
+    for k in multipliers:
+        yield Resolution(k * p, k * q)
+
+
+def count_resolutions(ratio_w, ratio_h, alignment: int = 1, **bounds) -> int:
+    params = resolution_step(ratio_w, ratio_h, alignment)
+    if params is None:
+        return 0
+    p, q, step = params
+    low, high = _multiplier_bounds(p, q, **bounds)
+    if high is None:
+        raise ValueError("counting needs an upper bound")
+    return max(0, high // step - _ceil_div(low, step) + 1)
+
+
+def closest_resolution(ratio_w, ratio_h, anchor_width=None, anchor_height=None, alignment: int = 1,
+                       **bounds) -> Resolution:
+    params = resolution_step(ratio_w, ratio_h, alignment)
+    if params is None or (anchor_width is None and anchor_height is None):
+        return None
+    p, q, step = params
+    low, high = _multiplier_bounds(p, q, **bounds)
+    first = _ceil_div(low, step)
+    last = None if high is None else high // step
+    if last is not None and last < first:
+        return None
+
+    candidates = set()
+    for anchor, side in ((anchor_width, p), (anchor_height, q)):
+        if anchor is None:
+            continue
+        ideal = _to_fraction(anchor) / (side * step)
+        for n in (math.floor(ideal), math.ceil(ideal)):
+            n = max(n, first)
+            if last is not None:
+                n = min(n, last)
+            candidates.add(n)
+
+    def error(n: int) -> Fraction:
+        k = n * step
+        total = Fraction(0)
+        if anchor_width is not None:
+            total += abs(k * p - _to_fraction(anchor_width)) / max(_to_fraction(anchor_width), 1)
+        if anchor_height is not None:
+            total += abs(k * q - _to_fraction(anchor_height)) / max(_to_fraction(anchor_height), 1)
+        return total
+
+    n = min(sorted(candidates), key=error)
+    return Resolution(n * step * p, n * step * q)
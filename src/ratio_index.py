@@ -0,0 +1,338 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from typing import Iterable, NamedTuple
+
+import numpy as np
+
+from aspect_logic import Ratio
+from dimension_cache import add_cache_argument, cached_probe
+from ratio_engine import DEFAULT_TOLERANCE
+from settings_manager import write_atomic
+
+INDEX_FILE = 'user/ratio_index.bin'
+INDEX_MAGIC = b'RIDX'
+INDEX_VERSION = 1
+_HEADER = struct.Struct('<4sIQQ')
+_ALIGNMENT = 8
+_COLUMNS = (
+    ("ratio", np.float64),
+    ("ratio_w", np.int32),
+    ("ratio_h", np.int32),
+    ("width", np.int32),
+    ("height", np.int32),
+    ("path_offsets", np.int64),
+)
+
+
+class RatioEntry(NamedTuple):
+    path: str
+    width: int
+    height: int
+    ratio_w: int
+    ratio_h: int
+    ratio: float
+
+
+class RatioGroup(NamedTuple):
+    ratio_w: int
+    ratio_h: int
+    rows: range
+
+
+def _padding(length: int) -> int:
+    return -length % _ALIGNMENT
+
+
+class RatioIndex:
+
+    def __init__(self):
+        self.ratio = np.empty(0, dtype=np.float64)
+        self.ratio_w = np.empty(0, dtype=np.int32)
+        self.ratio_h = np.empty(0, dtype=np.int32)
+        self.width = np.empty(0, dtype=np.int32)
+        self.height = np.empty(0, dtype=np.int32)
+        self._paths = []
+        self._path_offsets = None
+        self._path_blob = None
+        self._mmap = None
+
+        self._pending_paths = []
+        self._pending_w = []
+        self._pending_h = []
+
+    def __len__(self) -> int:
+        return len(self.ratio) + len(self._pending_paths)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add(self, path: str, width: int, height: int) -> bool:
+        if not width or not height or width <= 0 or height <= 0:
+            return False
+        self._pending_paths.append(path)
+        self._pending_w.append(int(width))
+        self._pending_h.append(int(height))
+        return True
+
+    def add_results(self, results: Iterable) -> int:
+        added = 0
+        for result in results:
+            if self.add(*result[:3]):
+                added += 1
+        return added
+
+    def _materialize_paths(self) -> list[str]:
+        if self._path_offsets is None:
+            return self._paths
+        blob = self._path_blob
+        offsets = self._path_offsets.tolist()
+        return [bytes(blob[offsets[i]:offsets[i + 1]]).decode('utf-8') for i in range(len(offsets) - 1)]
+
+    def _merge(self):
+        if not self._pending_paths:
+            return
+        new_w = np.asarray(self._pending_w, dtype=np.int64)
+        new_h = np.asarray(self._pending_h, dtype=np.int64)
+        divisor = np.gcd(new_w, new_h)
+
+        paths = self._materialize_paths() + self._pending_paths
+        ratio = np.concatenate((self.ratio, new_w / new_h))
+        ratio_w = np.concatenate((self.ratio_w, (new_w // divisor).astype(np.int32)))
+        ratio_h = np.concatenate((self.ratio_h, (new_h // divisor).astype(np.int32)))
+        width = np.concatenate((self.width, new_w.astype(np.int32)))
+        height = np.concatenate((self.height, new_h.astype(np.int32)))
+
+        order = np.argsort(ratio, kind='stable')
+        self.ratio = ratio[order]
+        self.ratio_w = ratio_w[order]
+        self.ratio_h = ratio_h[order]
+        self.width = width[order]
+        self.height = height[order]
+        self._paths = [paths[i] for i in order.tolist()]
+        self._path_offsets = None
+        self._path_blob = None
+        self.close()
+
+        self._pending_paths = []
+        self._pending_w = []
+        self._pending_h = []
+
+    def path(self, row: int) -> str:
+        self._merge()
+        if self._path_offsets is None:
+            return self._paths[row]
+        start, stop = int(self._path_offsets[row]), int(self._path_offsets[row + 1])
+        return bytes(self._path_blob[start:stop]).decode('utf-8')
+
+    def entry(self, row: int) -> RatioEntry:
+        self._merge()
+        return RatioEntry(self.path(row), int(self.width[row]), int(self.height[row]),
+                          int(self.ratio_w[row]), int(self.ratio_h[row]), float(self.ratio[row]))
+
+    def entries(self, rows: Iterable[int]) -> list[RatioEntry]:
+        return [self.entry(row) for row in rows]
+
+    def between(self, low: float, high: float) -> range:
+        self._merge()
+        start = int(np.searchsorted(self.ratio, low, side='left'))
+        stop = int(np.searchsorted(self.ratio, high, side='right'))
+        return range(start, max(start, stop))
+
+    def near(self, ratio_w: float, ratio_h: float, tolerance: float = DEFAULT_TOLERANCE) -> range:
+        value = ratio_w / ratio_h
+        return self.between(value * (1 - tolerance), value * (1 + tolerance))
+
+    def exact(self, ratio_w: int, ratio_h: int) -> range:
+        return self.between(ratio_w / ratio_h, ratio_w / ratio_h)
+
+    def histogram(self, bins: int = 20, low: float = None, high: float = None,
+                  log_scale: bool = True) -> tuple[np.ndarray, np.ndarray]:
+        self._merge()
+        if not len(self.ratio):
+            return np.empty(0), np.empty(0, dtype=np.int64)
+        low = float(self.ratio[0]) if low is None else low
+        high = float(self.ratio[-1]) if high is None else high
+        if log_scale and low > 0:
+            edges = np.geomspace(low, high, bins + 1) if high > low else np.array([low, high])
+        else:
+            edges = np.linspace(low, high, bins + 1)
+        positions = np.searchsorted(self.ratio, edges, side='left')
+        positions[-1] = np.searchsorted(self.ratio, edges[-1], side='right')
+        return edges, np.diff(positions)
+
+    def groups(self, min_count: int = 1, top: int = None) -> list[RatioGroup]:
+        self._merge()
+        if not len(self.ratio):
+            return []
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(self.ratio)) + 1))
+        stops = np.append(starts[1:], len(self.ratio))
+        counts = stops - starts
+        order = np.argsort(-counts, kind='stable')[:top]
+        result = []
+        for index in order.tolist():
+            if counts[index] < min_count:
+                break
+            start = int(starts[index])
+            result.append(RatioGroup(int(self.ratio_w[start]), int(self.ratio_h[start]),
+                                     range(start, int(stops[index]))))
+        return result
+
+    def save(self, file_path: str = None) -> str:
+        self._merge()
+        file_path = file_path or INDEX_FILE
+        encoded = [path.encode('utf-8') for path in self._materialize_paths()]
+        path_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            path_offsets[1:] = np.cumsum([len(path) for path in encoded])
+        columns = {
+            "ratio": self.ratio, "ratio_w": self.ratio_w, "ratio_h": self.ratio_h,
+            "width": self.width, "height": self.height, "path_offsets": path_offsets,
+        }
+
+        parts = []
+        position = _HEADER.size
+        for name, dtype in _COLUMNS:
+            data = np.ascontiguousarray(columns[name], dtype=dtype).tobytes()
+            parts.append(data + b'\0' * _padding(len(data)))
+            position += len(parts[-1])
+        blob = b''.join(encoded)
+        header = _HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(self.ratio), len(blob))
+        write_atomic(file_path, header + b''.join(parts) + blob)
+        return file_path
+
+    @classmethod
+    def load(cls, file_path: str = None) -> "RatioIndex":
+        file_path = file_path or INDEX_FILE
+        index = cls()
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < _HEADER.size:
+                raise ValueError(f"not a ratio index: {file_path}")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, count, blob_length = _HEADER.unpack_from(mapped, 0)
+            if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                raise ValueError(f"not a ratio index: {file_path}")
+
+            position = _HEADER.size
+            columns = {}
+            offsets = None
+            for name, dtype in _COLUMNS:
+                length = count + 1 if name == "path_offsets" else count
+                columns[name] = np.frombuffer(mapped, dtype=dtype, count=length, offset=position)
+                size = length * np.dtype(dtype).itemsize
+                position += size + _padding(size)
+            # ヘッダーが壊れているとパスの途中で読み終えてしまうため、実際のファイルサイズと照合する
+            offsets = columns["path_offsets"]
+            if position + blob_length > len(mapped) or offsets[0] != 0 or offsets[-1] != blob_length:
+                raise ValueError(f"truncated ratio index: {file_path}")
+        except ValueError:
+            columns = offsets = None
+            mapped.close()
+            raise
+
+        index.ratio = columns["ratio"]
+        index.ratio_w = columns["ratio_w"]
+        index.ratio_h = columns["ratio_h"]
+        index.width = columns["width"]
+        index.height = columns["height"]
+        index._path_offsets = columns["path_offsets"]
+        index._path_blob = memoryview(mapped)[position:position + blob_length]
+        index._mmap = mapped
+        return index
+
+    def close(self):
+        if self._mmap is None:
+            return
+        if self._path_offsets is not None:
+            self.ratio = np.empty(0, dtype=np.float64)
+            self.ratio_w = self.ratio_h = self.width = self.height = np.empty(0, dtype=np.int32)
+            self._path_offsets = None
+            self._path_blob.release()
+            self._path_blob = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._mmap = None
+
+
+def _parse_ratio(parser: argparse.ArgumentParser, text: str) -> Ratio:
+    try:
+        return Ratio.parse(text)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="run_cli.py index",
+        description="Build and query a sorted ratio index over scanned image libraries."
+    )
+    parser.add_argument("--index", default=INDEX_FILE, help=f"index file (default: {INDEX_FILE})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="scan folders and add their images to the index")
+    build.add_argument("folders", nargs="+")
+    build.add_argument("--append", action="store_true", help="add to the existing index instead of replacing it")
+    add_cache_argument(build)
+
+    near = commands.add_parser("near", help="list images within a tolerance of a ratio")
+    near.add_argument("ratio", help="ratio such as 4:5")
+    near.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                      help=f"relative tolerance (default: {DEFAULT_TOLERANCE})")
+    near.add_argument("--count", action="store_true", help="print only the number of matches")
+
+    histogram = commands.add_parser("histogram", help="print a histogram of ratios")
+    histogram.add_argument("--bins", type=int, default=20)
+    histogram.add_argument("--linear", action="store_true", help="use linear instead of logarithmic buckets")
+
+    groups = commands.add_parser("groups", help="count images per exact reduced ratio")
+    groups.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        from directory_scanner import scan_paths
+
+        index = RatioIndex()
+        if args.append and os.path.exists(args.index):
+            index = RatioIndex.load(args.index)
+        with cached_probe(args.cache) as probe:
+            added = index.add_results(scan_paths(args.folders, probe=probe))
+        index.save(args.index)
+        print(f"{args.index}: {added} added, {len(index)} total", file=sys.stderr)
+        return 0
+
+    try:
+        index = RatioIndex.load(args.index)
+    except (OSError, ValueError) as e:
+        print(f"エラー: インデックスを開けませんでした ({args.index}): {e}", file=sys.stderr)
+        return 1
+
+    try:
+        with index:
+            if args.command == "near":
+                ratio = _parse_ratio(near, args.ratio)
+                rows = index.near(ratio.width, ratio.height, tolerance=args.tolerance)
+                if args.count:
+                    print(len(rows))
+                    return 0
+                for row in rows:
+                    sys.stdout.write(json.dumps(index.entry(row)._asdict(), ensure_ascii=False) + "\n")
+            elif args.command == "histogram":
+                edges, counts = index.histogram(args.bins, log_scale=not args.linear)
+                for low, high, count in zip(edges[:-1].tolist(), edges[1:].tolist(), counts.tolist()):
+                    print(f"{low:.4f}\t{high:.4f}\t{count}")
+            else:
+                for group in index.groups(top=args.top):
+                    print(f"{group.ratio_w}:{group.ratio_h}\t{len(group.rows)}")
+    except BrokenPipeError:
+        return 1
+    return 0
@@ -0,0 +1,212 @@
+import csv
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from aspect_logic import format_ratio, simplify_aspect_ratio
+
+POLL_INTERVAL_MS = 50
+MAX_ROWS_PER_POLL = 5000
+DEFAULT_ROW_HEIGHT = 20
+COLUMNS = ("name", "width", "height", "ratio")
+
+
+def _ratio_value(record) -> float:
+    ratio = record[3]
+    return -1.0 if ratio is None else ratio.value
+
+
+SORT_KEYS = {
+    "name": lambda record: record[0].lower(),
+    "width": lambda record: record[1] if record[1] is not None else -1,
+    "height": lambda record: record[2] if record[2] is not None else -1,
+    "ratio": _ratio_value,
+}
+
+
+class ResultsWindow(tk.Toplevel):
+
+    def __init__(self, master, i18n, title: str):
+        super().__init__(master)
+        self.i18n = i18n
+        self.title(title)
+        self.geometry("560x420")
+
+        self.records = []
+        self.cancel_event = threading.Event()
+        self._rows = queue.Queue()
+        self._worker = None
+        self._finished = False
+        self._offset = 0
+        self._visible_count = 0
+        self._sort_column = None
+        self._sort_reverse = False
+
+        self.tree = ttk.Treeview(self, columns=COLUMNS, show="headings", selectmode="browse")
+        for column, text_key, width, anchor in (
+            ("name", "column_name", 300, tk.W),
+            ("width", "column_width", 70, tk.E),
+            ("height", "column_height", 70, tk.E),
+            ("ratio", "column_ratio", 90, tk.E),
+        ):
+            self.tree.heading(column, text=self.i18n.get_string(text_key),
+                              command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=width, anchor=anchor, stretch=(column == "name"))
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+
+        footer = ttk.Frame(self, padding=(5, 2))
+        footer.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E))
+        footer.columnconfigure(0, weight=1)
+        self.status_label = ttk.Label(footer, text="")
+        self.status_label.grid(row=0, column=0, sticky=tk.W)
+        export_button = ttk.Button(footer, text=self.i18n.get_string("export_csv"), command=self.export_csv)
+        export_button.grid(row=0, column=1, sticky=tk.E)
+
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        row_height = ttk.Style(self).lookup("Treeview", "rowheight")
+        try:
+            self._row_height = int(row_height) or DEFAULT_ROW_HEIGHT
+        except (TypeError, ValueError):
+            self._row_height = DEFAULT_ROW_HEIGHT
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_rows(3))
+        self.tree.bind("<Prior>", lambda event: self.scroll_rows(-self._visible_count))
+        self.tree.bind("<Next>", lambda event: self.scroll_rows(self._visible_count))
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def feed(self, records):
+        def run():
+            try:
+                for record in records:
+                    if self.cancel_event.is_set():
+                        break
+                    name, width, height = record[:3]
+                    ratio = record[3] if len(record) > 3 else simplify_aspect_ratio(width, height)
+                    self._rows.put((name, width, height, ratio))
+            except Exception as e:
+                self._rows.put((f"<{e}>", None, None, None))
+            finally:
+                self._rows.put(None)
+
+        self._worker = threading.Thread(target=run, daemon=True)
+        self._worker.start()
+        self.after(POLL_INTERVAL_MS, self._poll_rows)
+
+    def _poll_rows(self):
+        if not self.winfo_exists():
+            return
+        added = []
+        for _ in range(MAX_ROWS_PER_POLL):
+            try:
+                row = self._rows.get_nowait()
+            except queue.Empty:
+                break
+            if row is None:
+                self._finished = True
+                break
+            added.append(row)
+
+        if added:
+            self.records.extend(added)
+            if self._sort_column is not None:
+                self.records.sort(key=SORT_KEYS[self._sort_column], reverse=self._sort_reverse)
+            self._render()
+        elif self._finished:
+            self._update_status()
+
+        if not self._finished:
+            self.after(POLL_INTERVAL_MS, self._poll_rows)
+
+    def sort_by(self, column: str):
+        if self._sort_column == column:
+            self._sort_reverse = not self._sort_reverse
+        else:
+            self._sort_column = column
+            self._sort_reverse = False
+        self.records.sort(key=SORT_KEYS[column], reverse=self._sort_reverse)
+        self._offset = 0
+        self._render()
+
+    def scroll_rows(self, delta: int):
+        self._set_offset(self._offset + delta)
+
+    def _set_offset(self, offset: int):
+        offset = max(0, min(offset, len(self.records) - self._visible_count))
+        if offset != self._offset:
+            self._offset = offset
+            self._render()
+
+    def _on_scrollbar(self, action: str, value: str, unit: str = None):
+        if action == "moveto":
+            self._set_offset(round(float(value) * len(self.records)))
+        elif action == "scroll":
+            amount = int(value) * (self._visible_count if unit == "pages" else 1)
+            self.scroll_rows(amount)
+
+    def _on_mousewheel(self, event):
+        self.scroll_rows(-3 if event.delta > 0 else 3)
+
+    def _on_resize(self, event):
+        visible_count = max(1, event.height // self._row_height - 1)
+        if visible_count != self._visible_count:
+            self._visible_count = visible_count
+            self._set_offset(self._offset)
+            self._render()
+
+    def _render(self):
+        items = self.tree.get_children()
+        rows = self.records[self._offset:self._offset + self._visible_count]
+
+        for index, record in enumerate(rows):
+            name, width, height, ratio = record
+            values = (name, "" if width is None else width, "" if height is None else height, format_ratio(ratio))
+            if index < len(items):
+                self.tree.item(items[index], values=values)
+            else:
+                self.tree.insert("", tk.END, values=values)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+
+        total = len(self.records)
+        if total:
+            self.scrollbar.set(self._offset / total, min(1.0, (self._offset + len(rows)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self._update_status()
+
+    def _update_status(self):
+        text = f"{len(self.records):,}"
+        if not self._finished:
+            text += " ..."
+        self.status_label.config(text=text)
+
+    def export_csv(self):
+        file_path = filedialog.asksaveasfilename(
+            parent=self,
+            title=self.i18n.get_string("export_csv"),
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv")]
+        )
+        if not file_path:
+            return
+        try:
+            with open(file_path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(COLUMNS)
+                writer.writerows((name, width, height, format_ratio(ratio))
+                                 for name, width, height, ratio in self.records)
+        except OSError as e:
+            messagebox.showerror(self.title(), str(e), parent=self)
+
+    def _on_close(self):
+        self.cancel_event.set()
+        self.destroy()
@@ -1,42 +1,185 @@
+import atexit
 import json
 import os
+import tempfile
+import threading
+import time
 
-SETTINGS_FILE = 'user/settings.json'
+import metrics
 
+# 「プログラムから開く」などで作業ディレクトリが変わっても同じ設定を読み書きするよう、アプリのフォルダに固定する
+APP_USER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'user')
+SETTINGS_FILE = os.path.join(APP_USER_DIR, 'settings.json')
+FLUSH_DELAY = 0.5
 
-class SettingsManager:
 
-    @staticmethod
-    def _ensure_directory_exists(file_path: str):
-        dir_name = os.path.dirname(file_path)
+def ensure_parent_dir(file_path: str):
+    dir_name = os.path.dirname(file_path)
 
-        if dir_name:
-            os.makedirs(dir_name, exist_ok=True)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
 
-    @classmethod
-    def load_settings(cls, settings_file_path: str = None) -> dict:
-        file_path = settings_file_path or SETTINGS_FILE
 
-        cls._ensure_directory_exists(file_path)
-
-        if not os.path.exists(file_path):
-            return {}
+def write_atomic(file_path: str, data: bytes, mode: int = None):
+    ensure_parent_dir(file_path)
+    dir_name = os.path.dirname(file_path) or '.'
+    if mode is None:
+        try:
+            mode = os.stat(file_path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
 
+    with tempfile.NamedTemporaryFile('wb', dir=dir_name, prefix='.tmp-', delete=False) as f:
+        temp_path = f.name
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (IOError, json.JSONDecodeError) as e:
-            print(f"警告: 設定ファイルのロードに失敗しました ({file_path}): {e}")
-            return {}
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        except OSError:
+            f.close()
+            os.remove(temp_path)
+            raise
+    try:
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, file_path)
+    except OSError:
+        os.remove(temp_path)
+        raise
 
-    @classmethod
-    def save_settings(cls, settings: dict, settings_file_path: str = None):
-        file_path = settings_file_path or SETTINGS_FILE
 
-        cls._ensure_directory_exists(file_path)
+class SettingsStore:
 
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(settings, f, indent=4, ensure_ascii=False)
-        except IOError as e:
-            print(f"エラー: 設定ファイルの保存に失敗しました ({file_path}): {e}")
+    def __init__(self, settings_file_path: str = None, flush_delay: float = FLUSH_DELAY):
+        self.file_path = settings_file_path or SETTINGS_FILE
+        self.flush_delay = flush_delay
+        self.load_time_ms = None
+        self.last_flush_time_ms = None
+        self.flush_count = 0
+
+        self._data = None
+        self._dirty_keys = set()
+        self._lock = threading.RLock()
+        self._timer = None
+
+    def load(self) -> dict:
+        with self._lock:
+            if self._data is not None:
+                return self._data
+
+            start = time.perf_counter()
+            ensure_parent_dir(self.file_path)
+            self._data = {}
+            if os.path.exists(self.file_path):
+                try:
+                    with open(self.file_path, 'r', encoding='utf-8') as f:
+                        self._data = json.load(f)
+                except (IOError, json.JSONDecodeError) as e:
+                    print(f"警告: 設定ファイルのロードに失敗しました ({self.file_path}): {e}")
+            self.load_time_ms = (time.perf_counter() - start) * 1000
+            metrics.observe("settings_disk_load", self.load_time_ms / 1000)
+            return self._data
+
+    def get(self, key: str, default=None):
+        return self.load().get(key, default)
+
+    def set(self, key: str, value):
+        with self._lock:
+            data = self.load()
+            if key not in data or data[key] != value:
+                data[key] = value
+                self._dirty_keys.add(key)
+
+    def update(self, settings: dict):
+        with self._lock:
+            for key, value in settings.items():
+                self.set(key, value)
+
+    def replace(self, settings: dict):
+        with self._lock:
+            data = self.load()
+            for key in list(data):
+                if key not in settings:
+                    del data[key]
+                    self._dirty_keys.add(key)
+            self.update(settings)
+
+    @property
+    def dirty_keys(self) -> set:
+        return set(self._dirty_keys)
+
+    def schedule_flush(self):
+        with self._lock:
+            if not self._dirty_keys:
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self, force: bool = False) -> bool:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty_keys and not force:
+                return False
+
+            start = time.perf_counter()
+            try:
+                text = json.dumps(self.load(), indent=4, ensure_ascii=False)
+                write_atomic(self.file_path, text.encode('utf-8'))
+            except (IOError, OSError, TypeError, ValueError) as e:
+                print(f"エラー: 設定ファイルの保存に失敗しました ({self.file_path}): {e}")
+                return False
+
+            self._dirty_keys.clear()
+            self.flush_count += 1
+            self.last_flush_time_ms = (time.perf_counter() - start) * 1000
+            metrics.observe("settings_flush", self.last_flush_time_ms / 1000)
+            return True
+
+    def stats(self) -> dict:
+        return {
+            "load_time_ms": self.load_time_ms,
+            "last_flush_time_ms": self.last_flush_time_ms,
+            "flush_count": self.flush_count,
+            "dirty_keys": sorted(self._dirty_keys),
+        }
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_settings_store(settings_file_path: str = None) -> SettingsStore:
+    file_path = os.path.abspath(settings_file_path or SETTINGS_FILE)
+    with _stores_lock:
+        store = _stores.get(file_path)
+        if store is None:
+            store = SettingsStore(settings_file_path or SETTINGS_FILE)
+            _stores[file_path] = store
+        return store
+
+
+def _flush_all_stores():
+    for store in list(_stores.values()):
+        store.flush()
+
+
+atexit.register(_flush_all_stores)
+
+
+class SettingsManager:
+
+    @classmethod
+    @metrics.timed("settings_load")
+    def load_settings(cls, settings_file_path: str = None) -> dict:
+        return dict(get_settings_store(settings_file_path).load())
+
+    @classmethod
+    @metrics.timed("settings_save")
+    def save_settings(cls, settings: dict, settings_file_path: str = None):
+        store = get_settings_store(settings_file_path)
+        store.replace(settings)
+        store.flush()
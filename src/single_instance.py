@@ -0,0 +1,123 @@
+import json
+import os
+import secrets
+import socket
+import threading
+from typing import Callable
+
+from settings_manager import APP_USER_DIR, write_atomic
+
+INSTANCE_FILE = os.path.join(APP_USER_DIR, 'instance.json')
+CONNECT_TIMEOUT = 0.5
+MAX_REQUEST_BYTES = 1024 * 1024
+_LOOPBACK = "127.0.0.1"
+
+
+def _read_instance(instance_file: str) -> dict:
+    try:
+        with open(instance_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("port"), int) or not data.get("token"):
+        return None
+    return data
+
+
+def forward_to_running_instance(paths: list[str], instance_file: str = None,
+                                timeout: float = CONNECT_TIMEOUT) -> bool:
+    instance = _read_instance(instance_file or INSTANCE_FILE)
+    if instance is None:
+        return False
+
+    request = {"token": instance["token"], "paths": [os.path.abspath(path) for path in paths]}
+    try:
+        with socket.create_connection((_LOOPBACK, instance["port"]), timeout=timeout) as sock:
+            sock.sendall(json.dumps(request, ensure_ascii=False).encode('utf-8') + b"\n")
+            sock.shutdown(socket.SHUT_WR)
+            reply = sock.recv(16)
+    except OSError:
+        return False
+    return reply.strip() == b"ok"
+
+
+class InstanceServer:
+
+    def __init__(self, on_paths: Callable[[list[str]], None], instance_file: str = None):
+        self.on_paths = on_paths
+        self.instance_file = instance_file or INSTANCE_FILE
+        self.token = secrets.token_hex(16)
+        self._socket = None
+        self._thread = None
+
+    def start(self) -> bool:
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            listener.bind((_LOOPBACK, 0))
+            listener.listen(8)
+            data = {"pid": os.getpid(), "port": listener.getsockname()[1], "token": self.token}
+            write_atomic(self.instance_file, json.dumps(data).encode('utf-8'), mode=0o600)
+        except OSError as e:
+            listener.close()
+            print(f"警告: 単一インスタンス用のソケットを開けませんでした: {e}")
+            return False
+
+        self._socket = listener
+        self._thread = threading.Thread(target=self._serve, args=(listener,), daemon=True)
+        self._thread.start()
+        return True
+
+    def _serve(self, listener: socket.socket):
+        while True:
+            try:
+                connection, _ = listener.accept()
+            except OSError:
+                return
+            with connection:
+                try:
+                    connection.settimeout(CONNECT_TIMEOUT)
+                    self._handle(connection)
+                except OSError:
+                    continue
+
+    def _handle(self, connection: socket.socket):
+        chunks = []
+        received = 0
+        while received <= MAX_REQUEST_BYTES:
+            chunk = connection.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            received += len(chunk)
+            if chunk.endswith(b"\n"):
+                break
+
+        try:
+            request = json.loads(b"".join(chunks))
+        except (ValueError, UnicodeDecodeError):
+            return
+        if not isinstance(request, dict) or not secrets.compare_digest(str(request.get("token")), self.token):
+            return
+        paths = request.get("paths")
+        if not isinstance(paths, list):
+            return
+
+        self.on_paths([path for path in paths if isinstance(path, str) and path])
+        connection.sendall(b"ok\n")
+
+    def close(self):
+        if self._socket is None:
+            return
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+        self._socket = None
+
+        instance = _read_instance(self.instance_file)
+        if instance is not None and instance.get("token") == self.token:
+            try:
+                os.remove(self.instance_file)
+            except OSError:
+                pass
@@ -0,0 +1,36 @@
+import sys
+import time
+
+
+class StartupProfiler:
+
+    def __init__(self):
+        self.enabled = False
+        self.start_time = time.perf_counter()
+        self.last_time = self.start_time
+        self.phases = []
+
+    def enable(self, start_time: float = None):
+        self.enabled = True
+        if start_time is not None:
+            self.start_time = start_time
+            self.last_time = start_time
+
+    def mark(self, phase: str):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last_time, now - self.start_time))
+        self.last_time = now
+
+    def report(self, stream=None) -> str:
+        lines = [f"{'phase':<24}{'ms':>10}{'total ms':>12}"]
+        for phase, elapsed, total in self.phases:
+            lines.append(f"{phase:<24}{elapsed * 1000:>10.1f}{total * 1000:>12.1f}")
+        text = "\n".join(lines)
+        if self.enabled:
+            print(text, file=stream or sys.stderr)
+        return text
+
+
+profiler = StartupProfiler()
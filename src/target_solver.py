@@ -0,0 +1,173 @@
+import math
+from typing import NamedTuple
+
+MODE_CONTAIN = "contain"
+MODE_COVER = "cover"
+MODE_PAD = "pad"
+SOLVER_MODES = (MODE_CONTAIN, MODE_COVER, MODE_PAD)
+
+_EPSILON = 1e-9
+
+
+class TargetSolution(NamedTuple):
+    width: float
+    height: float
+    canvas_width: float
+    canvas_height: float
+    offset_x: float
+    offset_y: float
+    scale: float
+
+
+def _bound_factor(width: float, height: float, max_w: float, max_h: float, max_megapixels: float) -> float:
+    factor = 1.0
+    if max_w is not None and max_w > 0:
+        factor = min(factor, max_w / width)
+    if max_h is not None and max_h > 0:
+        factor = min(factor, max_h / height)
+    if max_megapixels is not None and max_megapixels > 0:
+        factor = min(factor, math.sqrt(max_megapixels * 1_000_000 / (width * height)))
+    return factor
+
+
+def _floor_aligned(value: float, alignment: int) -> int:
+    return max(alignment, math.floor(value / alignment + _EPSILON) * alignment)
+
+
+def _ceil_aligned(value: float, alignment: int) -> int:
+    return max(alignment, math.ceil(value / alignment - _EPSILON) * alignment)
+
+
+def solve_target(src_w: float, src_h: float, box_w: float = None, box_h: float = None, mode: str = MODE_CONTAIN,
+                 max_w: float = None, max_h: float = None, max_megapixels: float = None,
+                 integer: bool = False, alignment: int = 1) -> TargetSolution:
+    if src_w is None or src_h is None or src_w <= 0 or src_h <= 0 or mode not in SOLVER_MODES:
+        return None
+    if box_w is not None and box_w <= 0:
+        box_w = None
+    if box_h is not None and box_h <= 0:
+        box_h = None
+
+    if box_w is None and box_h is None:
+        box_w, box_h = src_w, src_h
+    elif box_w is None:
+        box_w = box_h * src_w / src_h
+    elif box_h is None:
+        box_h = box_w * src_h / src_w
+
+    if mode == MODE_CONTAIN:
+        scale = min(box_w / src_w, box_h / src_h)
+        scale *= _bound_factor(src_w * scale, src_h * scale, max_w, max_h, max_megapixels)
+        width = canvas_w = src_w * scale
+        height = canvas_h = src_h * scale
+    else:
+        factor = _bound_factor(box_w, box_h, max_w, max_h, max_megapixels)
+        canvas_w = box_w * factor
+        canvas_h = box_h * factor
+        if mode == MODE_COVER:
+            scale = max(canvas_w / src_w, canvas_h / src_h)
+        else:
+            scale = min(canvas_w / src_w, canvas_h / src_h)
+        width = src_w * scale
+        height = src_h * scale
+
+    if integer or alignment > 1:
+        alignment = max(1, int(alignment))
+        canvas_w = _floor_aligned(canvas_w, alignment)
+        canvas_h = _floor_aligned(canvas_h, alignment)
+        if mode == MODE_CONTAIN:
+            width, height = canvas_w, canvas_h
+        elif mode == MODE_COVER:
+            width = max(_ceil_aligned(width, alignment), canvas_w)
+            height = max(_ceil_aligned(height, alignment), canvas_h)
+        else:
+            width = min(_floor_aligned(width, alignment), canvas_w)
+            height = min(_floor_aligned(height, alignment), canvas_h)
+        offset_x = abs(width - canvas_w) // 2
+        offset_y = abs(height - canvas_h) // 2
+    else:
+        offset_x = abs(width - canvas_w) / 2
+        offset_y = abs(height - canvas_h) / 2
+
+    return TargetSolution(width, height, canvas_w, canvas_h, offset_x, offset_y, width / src_w)
+
+
+def solve_target_batch(src_w, src_h, box_w=None, box_h=None, mode=MODE_CONTAIN, max_w=None, max_h=None,
+                       max_megapixels=None, integer: bool = False, alignment: int = 1) -> TargetSolution:
+    import numpy as np
+
+    def column(values):
+        if values is None:
+            return np.nan
+        return np.asarray(values, dtype=np.float64)
+
+    sw, sh, bw, bh, mw, mh, mp = np.broadcast_arrays(
+        column(src_w), column(src_h), column(box_w), column(box_h),
+        column(max_w), column(max_h), column(max_megapixels)
+    )
+    modes = np.broadcast_to(np.asarray(mode), sw.shape)
+    is_contain = modes == MODE_CONTAIN
+    is_cover = modes == MODE_COVER
+    valid = (sw > 0) & (sh > 0) & (is_contain | is_cover | (modes == MODE_PAD))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bw = np.where(bw > 0, bw, np.nan)
+        bh = np.where(bh > 0, bh, np.nan)
+        no_box = np.isnan(bw) & np.isnan(bh)
+        bw, bh = (
+            np.where(no_box, sw, np.where(np.isnan(bw), bh * sw / sh, bw)),
+            np.where(no_box, sh, np.where(np.isnan(bh), bw * sh / sw, bh)),
+        )
+
+        def bound_factor(width, height):
+            factor = np.ones_like(width)
+            factor = np.where(mw > 0, np.minimum(factor, mw / width), factor)
+            factor = np.where(mh > 0, np.minimum(factor, mh / height), factor)
+            return np.where(mp > 0, np.minimum(factor, np.sqrt(mp * 1_000_000 / (width * height))), factor)
+
+        contain_scale = np.minimum(bw / sw, bh / sh)
+        contain_scale = contain_scale * bound_factor(sw * contain_scale, sh * contain_scale)
+
+        factor = bound_factor(bw, bh)
+        canvas_w = bw * factor
+        canvas_h = bh * factor
+        box_scale = np.where(is_cover, np.maximum(canvas_w / sw, canvas_h / sh),
+                             np.minimum(canvas_w / sw, canvas_h / sh))
+
+        scale = np.where(is_contain, contain_scale, box_scale)
+        width = sw * scale
+        height = sh * scale
+        canvas_w = np.where(is_contain, width, canvas_w)
+        canvas_h = np.where(is_contain, height, canvas_h)
+
+        if integer or alignment > 1:
+            a = max(1, int(alignment))
+
+            def floor_aligned(values):
+                return np.maximum(a, np.floor(values / a + _EPSILON) * a)
+
+            def ceil_aligned(values):
+                return np.maximum(a, np.ceil(values / a - _EPSILON) * a)
+
+            canvas_w = floor_aligned(canvas_w)
+            canvas_h = floor_aligned(canvas_h)
+            width = np.where(is_contain, canvas_w,
+                             np.where(is_cover, np.maximum(ceil_aligned(width), canvas_w),
+                                      np.minimum(floor_aligned(width), canvas_w)))
+            height = np.where(is_contain, canvas_h,
+                              np.where(is_cover, np.maximum(ceil_aligned(height), canvas_h),
+                                       np.minimum(floor_aligned(height), canvas_h)))
+            offset_x = np.floor(np.abs(width - canvas_w) / 2)
+            offset_y = np.floor(np.abs(height - canvas_h) / 2)
+        else:
+            offset_x = np.abs(width - canvas_w) / 2
+            offset_y = np.abs(height - canvas_h) / 2
+
+        scale = width / sw
+
+    results = []
+    for values in (width, height, canvas_w, canvas_h, offset_x, offset_y, scale):
+        values = np.array(values, dtype=np.float64)
+        values[~valid] = np.nan
+        results.append(values)
+    return TargetSolution(*results)
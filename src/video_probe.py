@@ -0,0 +1,276 @@
+import os
+import struct
+from typing import NamedTuple
+
+VIDEO_EXTENSIONS = (".mp4", ".m4v", ".mov", ".mkv", ".webm")
+
+_BMFF_CONTAINERS = frozenset((b'moov', b'trak', b'mdia', b'minf', b'stbl'))
+_BMFF_TOP_LEVEL = frozenset((b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'pnot'))
+_VISUAL_SAMPLE_ENTRY_SIZE = 78
+_MAX_BOX_PAYLOAD = 1 << 20
+
+_EBML_HEADER = 0x1A45DFA3
+_EBML_SEGMENT = 0x18538067
+_EBML_TRACKS = 0x1654AE6B
+_EBML_TRACK_ENTRY = 0xAE
+_EBML_TRACK_TYPE = 0x83
+_EBML_VIDEO = 0xE0
+_EBML_DESCEND = frozenset((_EBML_SEGMENT, _EBML_TRACKS))
+_EBML_VIDEO_FIELDS = {
+    0xB0: "pixel_width",
+    0xBA: "pixel_height",
+    0x54B0: "display_width",
+    0x54BA: "display_height",
+    0x54B2: "display_unit",
+    0x54AA: "crop_bottom",
+    0x54BB: "crop_top",
+    0x54CC: "crop_left",
+    0x54DD: "crop_right",
+}
+_MATROSKA_VIDEO_TRACK = 1
+_MATROSKA_UNIT_PIXELS = 0
+_MATROSKA_UNIT_ASPECT = 3
+
+
+class VideoSize(NamedTuple):
+    width: int
+    height: int
+    display_width: int
+    display_height: int
+
+
+def is_video_path(path: str) -> bool:
+    return path.lower().endswith(VIDEO_EXTENSIONS)
+
+
+def _stream_size(f) -> int:
+    try:
+        return os.fstat(f.fileno()).st_size
+    except (AttributeError, OSError, ValueError):
+        position = f.tell()
+        size = f.seek(0, os.SEEK_END)
+        f.seek(position)
+        return size
+
+
+def _iter_boxes(f, start: int, end: int):
+    position = start
+    while position + 8 <= end:
+        f.seek(position)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack('>I4s', header)
+        header_size = 8
+        if size == 1:
+            large = f.read(8)
+            if len(large) < 8:
+                return
+            size = struct.unpack('>Q', large)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - position
+        if size < header_size:
+            return
+        yield box_type, position + header_size, min(position + size, end)
+        position += size
+
+
+def _read_payload(f, start: int, end: int) -> bytes:
+    f.seek(start)
+    return f.read(min(end - start, _MAX_BOX_PAYLOAD))
+
+
+def _parse_tkhd(payload: bytes):
+    if not payload:
+        return None
+    offset = 4 + (32 if payload[0] == 1 else 20) + 8 + 8
+    if len(payload) < offset + 36 + 8:
+        return None
+    a, b, _, c, d = struct.unpack('>iiiii', payload[offset:offset + 20])
+    width, height = struct.unpack('>II', payload[offset + 36:offset + 44])
+    rotated = a == 0 and d == 0 and b != 0 and c != 0
+    return width / 65536, height / 65536, rotated
+
+
+def _parse_stsd(f, start: int, end: int):
+    f.seek(start)
+    head = f.read(8)
+    if len(head) < 8 or struct.unpack('>I', head[4:8])[0] == 0:
+        return None
+
+    for _, entry_start, entry_end in _iter_boxes(f, start + 8, end):
+        f.seek(entry_start)
+        entry = f.read(_VISUAL_SAMPLE_ENTRY_SIZE)
+        if len(entry) < _VISUAL_SAMPLE_ENTRY_SIZE:
+            return None
+        width, height = struct.unpack('>HH', entry[24:28])
+        h_spacing = v_spacing = 1
+        for child_type, child_start, child_end in _iter_boxes(f, entry_start + _VISUAL_SAMPLE_ENTRY_SIZE, entry_end):
+            if child_type == b'pasp':
+                spacing = _read_payload(f, child_start, child_end)
+                if len(spacing) >= 8:
+                    h_spacing, v_spacing = struct.unpack('>II', spacing[:8])
+                break
+        return width, height, h_spacing, v_spacing
+    return None
+
+
+def _probe_bmff_track(f, start: int, end: int, track: dict, parent: bytes = b'trak'):
+    for box_type, payload_start, box_end in _iter_boxes(f, start, end):
+        if box_type == b'tkhd':
+            track["tkhd"] = _parse_tkhd(_read_payload(f, payload_start, box_end))
+        elif box_type == b'hdlr':
+            # QuickTime の minf にはデータハンドラ (dhlr) の hdlr もあるため、mdia 直下のものだけを見る
+            if parent == b'mdia':
+                payload = _read_payload(f, payload_start, box_end)
+                track["handler"] = payload[8:12] if len(payload) >= 12 else None
+        elif box_type == b'stsd':
+            track["stsd"] = _parse_stsd(f, payload_start, box_end)
+        elif box_type in _BMFF_CONTAINERS:
+            _probe_bmff_track(f, payload_start, box_end, track, box_type)
+
+
+def _probe_bmff(f, file_size: int) -> VideoSize:
+    for box_type, payload_start, box_end in _iter_boxes(f, 0, file_size):
+        if box_type != b'moov':
+            continue
+        for trak_type, trak_start, trak_end in _iter_boxes(f, payload_start, box_end):
+            if trak_type != b'trak':
+                continue
+            track = {}
+            _probe_bmff_track(f, trak_start, trak_end, track)
+            if track.get("handler") != b'vide':
+                continue
+
+            tkhd = track.get("tkhd")
+            stsd = track.get("stsd")
+            if stsd is not None and stsd[0] and stsd[1]:
+                width, height, h_spacing, v_spacing = stsd
+                display_width = round(width * h_spacing / v_spacing) if h_spacing and v_spacing else width
+                display_height = height
+            elif tkhd is not None and tkhd[0] and tkhd[1]:
+                width = display_width = round(tkhd[0])
+                height = display_height = round(tkhd[1])
+            else:
+                continue
+
+            if tkhd is not None and tkhd[2]:
+                display_width, display_height = display_height, display_width
+            return VideoSize(width, height, display_width, display_height)
+        return None
+    return None
+
+
+def _read_vint(f, keep_marker: bool):
+    first = f.read(1)
+    if not first:
+        return None, 0
+    value = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not value & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        return None, 0
+    if not keep_marker:
+        value &= mask - 1
+    rest = f.read(length - 1)
+    if len(rest) < length - 1:
+        return None, 0
+    unknown = not keep_marker and value == mask - 1
+    for byte in rest:
+        value = (value << 8) | byte
+        unknown = unknown and byte == 0xFF
+    return (-1 if unknown else value), length
+
+
+def _iter_ebml(f, start: int, end: int, descend: frozenset = frozenset()):
+    position = start
+    while position < end:
+        f.seek(position)
+        element_id, id_length = _read_vint(f, keep_marker=True)
+        if element_id is None:
+            return
+        size, size_length = _read_vint(f, keep_marker=False)
+        if size is None:
+            return
+        data_start = position + id_length + size_length
+        data_end = end if size < 0 else min(data_start + size, end)
+        yield element_id, data_start, data_end
+        if element_id in descend:
+            position = data_start
+        elif size < 0:
+            return
+        else:
+            position = data_end
+
+
+def _read_uint(f, start: int, end: int) -> int:
+    f.seek(start)
+    return int.from_bytes(f.read(min(end - start, 8)), 'big')
+
+
+def _probe_matroska_video(f, start: int, end: int) -> dict:
+    fields = {}
+    for element_id, data_start, data_end in _iter_ebml(f, start, end):
+        name = _EBML_VIDEO_FIELDS.get(element_id)
+        if name is not None:
+            fields[name] = _read_uint(f, data_start, data_end)
+    return fields
+
+
+def _matroska_size(fields: dict) -> VideoSize:
+    width = fields.get("pixel_width")
+    height = fields.get("pixel_height")
+    if not width or not height:
+        return None
+
+    cropped_width = width - fields.get("crop_left", 0) - fields.get("crop_right", 0)
+    cropped_height = height - fields.get("crop_top", 0) - fields.get("crop_bottom", 0)
+    display_width = fields.get("display_width")
+    display_height = fields.get("display_height")
+    unit = fields.get("display_unit", _MATROSKA_UNIT_PIXELS)
+
+    if unit == _MATROSKA_UNIT_ASPECT and display_width and display_height:
+        return VideoSize(width, height, round(cropped_height * display_width / display_height), cropped_height)
+    if unit == _MATROSKA_UNIT_PIXELS:
+        return VideoSize(width, height, display_width or cropped_width, display_height or cropped_height)
+    return VideoSize(width, height, cropped_width, cropped_height)
+
+
+def _probe_matroska(f, file_size: int) -> VideoSize:
+    for element_id, data_start, data_end in _iter_ebml(f, 0, file_size, _EBML_DESCEND):
+        if element_id != _EBML_TRACK_ENTRY:
+            continue
+        track_type = None
+        video = None
+        for child_id, child_start, child_end in _iter_ebml(f, data_start, data_end):
+            if child_id == _EBML_TRACK_TYPE:
+                track_type = _read_uint(f, child_start, child_end)
+            elif child_id == _EBML_VIDEO:
+                video = _probe_matroska_video(f, child_start, child_end)
+        if track_type == _MATROSKA_VIDEO_TRACK and video:
+            return _matroska_size(video)
+    return None
+
+
+def probe_video(f) -> VideoSize:
+    f.seek(0)
+    head = f.read(12)
+    if len(head) < 12:
+        return None
+    if head[4:8] in _BMFF_TOP_LEVEL:
+        return _probe_bmff(f, _stream_size(f))
+    if struct.unpack('>I', head[:4])[0] == _EBML_HEADER:
+        return _probe_matroska(f, _stream_size(f))
+    return None
+
+
+def probe_video_file(path: str) -> VideoSize:
+    try:
+        with open(path, 'rb') as f:
+            return probe_video(f)
+    except (OSError, struct.error):
+        return None
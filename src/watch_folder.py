@@ -0,0 +1,166 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from typing import Callable, Iterator, NamedTuple
+
+from aspect_logic import Dimensions, Ratio, format_ratio, get_image_dimensions, simplify_aspect_ratio
+from dimension_cache import add_cache_argument, cached_probe
+from directory_scanner import iter_image_entries
+from settings_manager import write_atomic
+
+WATCH_INDEX_DIR = 'user/watch_index'
+WATCH_INDEX_VERSION = 2
+DEFAULT_INTERVAL = 2.0
+
+
+class WatchEvent(NamedTuple):
+    kind: str
+    path: str
+    width: int
+    height: int
+    ratio: Ratio
+
+
+def index_path_for(root: str, recursive: bool = True) -> str:
+    key = f"{os.path.abspath(root)}|{int(recursive)}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(WATCH_INDEX_DIR, f"{digest}.json")
+
+
+def _iter_file_stats(root: str, recursive: bool) -> Iterator[tuple[str, int, int]]:
+    for entry in iter_image_entries(root, recursive):
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        yield os.path.relpath(entry.path, root), st.st_size, st.st_mtime_ns
+
+
+class FolderWatcher:
+
+    def __init__(self, root: str, recursive: bool = True, index_path: str = None,
+                 probe: Callable[[str], Dimensions] = get_image_dimensions):
+        self.root = os.path.abspath(root)
+        self.recursive = recursive
+        self.index_path = index_path or index_path_for(self.root, recursive)
+        self.probe = probe
+
+        self.polls = 0
+        self.probes = 0
+        self.entries = {}
+        self._dirty = False
+        self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"警告: 監視インデックスのロードに失敗しました ({self.index_path}): {e}")
+            return
+
+        if data.get("version") != WATCH_INDEX_VERSION or data.get("root") != self.root:
+            return
+        self.entries = {path: tuple(entry) for path, entry in data.get("files", {}).items()}
+
+    def save_index(self) -> bool:
+        if not self._dirty:
+            return True
+        data = {
+            "version": WATCH_INDEX_VERSION,
+            "root": self.root,
+            "recursive": self.recursive,
+            "files": {path: list(entry) for path, entry in self.entries.items()},
+        }
+        try:
+            write_atomic(self.index_path, json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        except OSError as e:
+            print(f"エラー: 監視インデックスの保存に失敗しました ({self.index_path}): {e}")
+            return False
+        self._dirty = False
+        return True
+
+    def _event(self, kind: str, relative_path: str, width: int, height: int) -> WatchEvent:
+        return WatchEvent(kind, os.path.join(self.root, relative_path), width, height,
+                          simplify_aspect_ratio(width, height))
+
+    def poll(self) -> list[WatchEvent]:
+        self.polls += 1
+        events = []
+        seen = set()
+
+        for relative_path, size, mtime_ns in _iter_file_stats(self.root, self.recursive):
+            seen.add(relative_path)
+            previous = self.entries.get(relative_path)
+            if previous is not None and previous[0] == size and previous[1] == mtime_ns:
+                continue
+
+            width, height = self.probe(os.path.join(self.root, relative_path))
+            self.probes += 1
+            self.entries[relative_path] = (size, mtime_ns, width, height)
+            self._dirty = True
+
+            if previous is None:
+                events.append(self._event("added", relative_path, width, height))
+            elif (previous[2], previous[3]) != (width, height):
+                events.append(self._event("changed", relative_path, width, height))
+
+        for relative_path in self.entries.keys() - seen:
+            _, _, width, height = self.entries.pop(relative_path)
+            self._dirty = True
+            events.append(self._event("removed", relative_path, width, height))
+
+        self.save_index()
+        return events
+
+    def run(self, callback: Callable[[WatchEvent], None], stop_event: threading.Event,
+            interval: float = DEFAULT_INTERVAL):
+        while not stop_event.is_set():
+            for event in self.poll():
+                callback(event)
+            stop_event.wait(interval)
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="run_cli.py watch",
+        description="Watch a folder and print JSONL events for added, changed and removed image dimensions."
+    )
+    parser.add_argument("folder", help="folder to watch")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL,
+                        help=f"seconds between polls (default: {DEFAULT_INTERVAL})")
+    parser.add_argument("--once", action="store_true", help="poll once and exit")
+    parser.add_argument("--no-recursive", action="store_true", help="do not descend into sub folders")
+    parser.add_argument("--index", help="index file (default: user/watch_index/<hash>.json)")
+    add_cache_argument(parser)
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.folder):
+        print(f"エラー: フォルダが見つかりません: {args.folder}", file=sys.stderr)
+        return 1
+
+    def emit(event: WatchEvent):
+        record = event._asdict()
+        record["ratio"] = format_ratio(event.ratio)
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+    with cached_probe(args.cache) as probe:
+        watcher = FolderWatcher(args.folder, recursive=not args.no_recursive, index_path=args.index, probe=probe)
+        stop_event = threading.Event()
+        try:
+            if args.once:
+                for event in watcher.poll():
+                    emit(event)
+            else:
+                watcher.run(emit, stop_event, args.interval)
+        except (KeyboardInterrupt, BrokenPipeError):
+            pass
+        finally:
+            watcher.save_index()
+    return 0
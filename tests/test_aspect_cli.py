@@ -0,0 +1,34 @@
+import io
+import json
+
+import aspect_cli
+from aspect_cli import process_row
+
+
+def run(monkeypatch, capsys, *lines):
+    monkeypatch.setattr("sys.stdin", io.StringIO("".join(line + "\n" for line in lines)))
+    assert aspect_cli.main(["--format", "jsonl"]) == 0
+    captured = capsys.readouterr()
+    return [json.loads(line) for line in captured.out.splitlines()], captured.err
+
+
+def test_non_finite_values_are_treated_as_missing():
+    row = process_row({"original_w": 1920, "original_h": 1080, "target_w": "inf",
+                       "target_ratio_w": 4, "target_ratio_h": 3})
+    assert (row["final_w"], row["final_h"]) == (1920, 1440)
+    assert process_row({"original_w": "nan", "original_h": 1080})["original_ratio"] == "N/A"
+
+
+def test_non_scalar_values_are_treated_as_missing():
+    row = process_row({"original_w": "12", "original_h": {"a": 1}, "target_w": [1, 2]})
+    assert row["original_ratio"] == "N/A"
+
+
+def test_bad_rows_are_skipped(monkeypatch, capsys):
+    rows, err = run(monkeypatch, capsys,
+                    '[1, 2]',
+                    '{"original_w": "12", "original_h": {"a": 1}}',
+                    '{"original_w": 1e308, "original_h": 1}',
+                    '{"original_w": 1366, "original_h": 768}')
+    assert [row["original_ratio"] for row in rows] == ["N/A", "683:384"]
+    assert err.count("警告") == 2
@@ -0,0 +1,30 @@
+import pytest
+
+from aspect_logic import get_image_dimensions, get_image_info
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def save_with_orientation(path, size: tuple, orientation: int, image_format: str):
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    Image.new("L", size).save(path, image_format, exif=exif)
+
+
+@pytest.mark.parametrize("orientation, expected", [(1, (400, 300)), (3, (400, 300)), (6, (300, 400)), (8, (300, 400))])
+def test_pillow_fallback_applies_tiff_orientation(tmp_path, orientation, expected):
+    path = tmp_path / "photo.tif"
+    save_with_orientation(path, (400, 300), orientation, "TIFF")
+    info = get_image_info(str(path))
+    assert (info.width, info.height, info.orientation) == expected + (orientation,)
+
+
+def test_pillow_fallback_matches_header_probe(tmp_path):
+    tiff_path, jpeg_path = tmp_path / "photo.tif", tmp_path / "photo.jpg"
+    save_with_orientation(tiff_path, (400, 300), 6, "TIFF")
+    save_with_orientation(jpeg_path, (400, 300), 6, "JPEG")
+    assert get_image_dimensions(str(tiff_path)) == get_image_dimensions(str(jpeg_path)) == (300, 400)
+
+
+def test_missing_file():
+    assert get_image_dimensions("/nonexistent/photo.jpg") == (None, None)
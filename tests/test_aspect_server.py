@@ -0,0 +1,78 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from aspect_server import AspectServer, main
+
+
+def handle(request):
+    server = AspectServer()
+    try:
+        return asyncio.run(server.handle(request))
+    finally:
+        server.close()
+
+
+def test_overflow_is_reported_per_request():
+    response = handle({"op": "batch", "items": [
+        {"op": "simplify", "width": 1e308, "height": 1},
+        {"op": "simplify", "width": 16, "height": 9},
+    ]})
+    assert response["ok"] is True
+    assert response["result"][0]["ok"] is False
+    assert response["result"][1] == {"ok": True, "result": {"ratio": "16:9"}}
+
+
+def test_non_finite_result_is_reported_per_request():
+    response = handle({"op": "batch", "items": [
+        {"id": 1, "op": "solve", "src_w": 1e-308, "src_h": 1, "box_w": 1e308},
+        {"id": 2, "op": "simplify", "width": 4, "height": 3},
+    ]})
+    assert response["result"][0] == {"id": 1, "ok": False, "error": "result is not finite"}
+    assert response["result"][1]["ok"] is True
+    json.dumps(response, allow_nan=False)
+
+
+def test_connection_never_writes_non_finite_json():
+    async def exchange(lines):
+        server = AspectServer()
+        try:
+            listener = await server.start("127.0.0.1", 0)
+            async with listener:
+                host, port = listener.sockets[0].getsockname()[:2]
+                reader, writer = await asyncio.open_connection(host, port)
+                writer.write(b"".join(line + b"\n" for line in lines))
+                await writer.drain()
+                responses = [await reader.readline() for _ in lines]
+                writer.close()
+                await writer.wait_closed()
+                return responses
+        finally:
+            server.close()
+
+    responses = asyncio.run(exchange([
+        b'{"id": 7, "op": "solve", "src_w": 1e-308, "src_h": 1, "box_w": 1e308}',
+        b'{"id": NaN, "op": "simplify", "width": 4, "height": 3}',
+    ]))
+    assert json.loads(responses[0]) == {"id": 7, "ok": False, "error": "result is not finite"}
+    assert json.loads(responses[1]) == {"ok": False, "error": "result is not finite"}
+
+
+@pytest.mark.parametrize("host", ["0.0.0.0", "::", "192.168.1.10", "example.com"])
+def test_non_loopback_host_requires_allow_remote(host, capsys):
+    assert main(["--host", host]) == 1
+    assert "--allow-remote" in capsys.readouterr().err
+
+
+def test_unix_path_refuses_to_replace_regular_file(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_text("keep me")
+    server = AspectServer()
+    try:
+        with pytest.raises(FileExistsError):
+            asyncio.run(server.start(unix_path=str(path)))
+    finally:
+        server.close()
+    assert path.read_text() == "keep me"
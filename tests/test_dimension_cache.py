@@ -0,0 +1,127 @@
+import os
+
+import pytest
+
+from aspect_logic import Dimensions
+from dimension_cache import DimensionCache
+
+
+class CountingProbe:
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, path: str) -> Dimensions:
+        self.calls.append(path)
+        with open(path, 'rb') as f:
+            width, height = f.read().split(b'x')
+        return Dimensions(int(width), int(height))
+
+
+@pytest.fixture
+def probe():
+    return CountingProbe()
+
+
+def write_image(path, width: int, height: int, mtime_ns: int = None):
+    path.write_bytes(f"{width}x{height}".encode())
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_hit_does_not_probe_again(tmp_path, probe):
+    path = write_image(tmp_path / "a.jpg", 1920, 1080)
+    with DimensionCache(str(tmp_path / "cache.sqlite3"), probe=probe) as cache:
+        assert cache.get_image_dimensions(path) == (1920, 1080)
+        assert cache.get_image_dimensions(path) == (1920, 1080)
+        assert (cache.hits, cache.misses) == (1, 1)
+    assert len(probe.calls) == 1
+
+
+def test_persists_between_sessions(tmp_path, probe):
+    path = write_image(tmp_path / "a.jpg", 1920, 1080)
+    cache_file = str(tmp_path / "cache.sqlite3")
+    with DimensionCache(cache_file, probe=probe) as cache:
+        cache.get_image_dimensions(path)
+    with DimensionCache(cache_file, probe=probe) as cache:
+        assert cache.get_image_dimensions(path) == (1920, 1080)
+        assert cache.disk_hits == 1
+    assert len(probe.calls) == 1
+
+
+@pytest.mark.parametrize("change", ["size", "mtime", "inode"])
+def test_changed_file_is_probed_again(tmp_path, probe, change):
+    path = write_image(tmp_path / "a.jpg", 1920, 1080, mtime_ns=1_000_000_000)
+    with DimensionCache(str(tmp_path / "cache.sqlite3"), probe=probe) as cache:
+        cache.get_image_dimensions(path)
+        if change == "size":
+            write_image(tmp_path / "a.jpg", 10800, 1080, mtime_ns=1_000_000_000)
+        elif change == "mtime":
+            write_image(tmp_path / "a.jpg", 1080, 1920, mtime_ns=2_000_000_000)
+        else:
+            replacement = write_image(tmp_path / "b.jpg", 1080, 1920, mtime_ns=1_000_000_000)
+            os.replace(replacement, path)
+        assert cache.get_image_dimensions(path) != (1920, 1080)
+    assert len(probe.calls) == 2
+
+
+def test_missing_file_is_not_cached(tmp_path, probe):
+    with DimensionCache(str(tmp_path / "cache.sqlite3"), probe=probe) as cache:
+        assert cache.get_image_dimensions(str(tmp_path / "missing.jpg")) == (None, None)
+        assert cache.stats()["disk_entries"] == 0
+    assert probe.calls == []
+
+
+def test_eviction_keeps_recently_used_entries(tmp_path, probe):
+    paths = [write_image(tmp_path / f"{i}.jpg", i + 1, 1) for i in range(20)]
+    with DimensionCache(str(tmp_path / "cache.sqlite3"), max_entries=10, memory_entries=1, probe=probe) as cache:
+        for path in paths[:10]:
+            cache.get_image_dimensions(path)
+        cache.get_image_dimensions(paths[0])
+        for path in paths[10:12]:
+            cache.get_image_dimensions(path)
+        assert cache.evictions > 0
+        assert cache.stats()["disk_entries"] <= 10
+        calls = len(probe.calls)
+        cache.get_image_dimensions(paths[0])
+        assert len(probe.calls) == calls
+
+
+def test_concurrent_misses_count_the_entry_once(tmp_path):
+    import threading
+
+    path = write_image(tmp_path / "a.jpg", 1920, 1080)
+    barrier = threading.Barrier(2)
+
+    def slow_probe(image_path: str) -> Dimensions:
+        barrier.wait(timeout=5)
+        return Dimensions(1920, 1080)
+
+    with DimensionCache(str(tmp_path / "cache.sqlite3"), probe=slow_probe) as cache:
+        threads = [threading.Thread(target=cache.get_image_dimensions, args=(path,)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert cache.misses == 2
+        assert cache.stats()["disk_entries"] == 1
+        assert cache._db.execute("SELECT COUNT(*) FROM dimensions").fetchone()[0] == 1
+
+
+def test_disk_hits_update_last_used_in_batches(tmp_path, probe):
+    paths = [write_image(tmp_path / f"{i}.jpg", i + 1, 1) for i in range(3)]
+    cache_file = str(tmp_path / "cache.sqlite3")
+    with DimensionCache(cache_file, probe=probe) as cache:
+        for path in paths:
+            cache.get_image_dimensions(path)
+
+    with DimensionCache(cache_file, probe=probe) as cache:
+        statements = []
+        cache._db.set_trace_callback(statements.append)
+        for path in reversed(paths):
+            cache.get_image_dimensions(path)
+        assert not [statement for statement in statements if statement.startswith("UPDATE")]
+        cache.flush()
+        order = [row[0] for row in cache._db.execute("SELECT path FROM dimensions ORDER BY last_used")]
+        assert order == paths[::-1]
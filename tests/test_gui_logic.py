@@ -0,0 +1,106 @@
+from gui_logic import FINAL_OUTPUT_KEYS, ORIGINAL_OUTPUT_KEYS, GuiLogic
+
+
+class StubEntry:
+
+    def __init__(self, value: str = ""):
+        self.value = value
+
+    def get(self) -> str:
+        return self.value
+
+    def config(self, **kwargs):
+        pass
+
+    def delete(self, first, last=None):
+        self.value = ""
+
+    def insert(self, index, value):
+        self.value = value
+
+
+class StubVar:
+
+    def __init__(self, value: str):
+        self.value = value
+
+    def get(self) -> str:
+        return self.value
+
+
+def calculate(fit_mode: str = None, **inputs) -> dict:
+    keys = ("original_w", "original_h", "target_ratio_w", "target_ratio_h", "target_w", "target_h")
+    entries = {key: StubEntry(str(inputs.get(key, ""))) for key in keys}
+    output_entries = {key: StubEntry() for key in ORIGINAL_OUTPUT_KEYS + FINAL_OUTPUT_KEYS}
+    logic = GuiLogic(None, entries, {}, output_entries, {}, {}, None,
+                     fit_mode_var=StubVar(fit_mode) if fit_mode else None)
+    logic.calculate_aspects()
+    return {key: entry.get() for key, entry in output_entries.items()}
+
+
+def test_original_ratio_is_exact():
+    assert calculate(original_w=1.2345, original_h=1)["original_ratio"] == "2469:2000"
+
+
+def test_original_ratio_names_nearest_standard():
+    assert calculate(original_w=1366, original_h=768)["original_ratio"] == "683:384 (≈16:9)"
+
+
+def test_missing_size_is_not_available():
+    outputs = calculate(original_w="", original_h="")
+    assert outputs["original_ratio"] == "N/A"
+    assert outputs["final_ratio"] == "N/A"
+
+
+def test_cover_shows_scaled_size_and_crop_offset():
+    outputs = calculate("cover", original_w=4000, original_h=3000, target_w=1080, target_h=1350)
+    assert (outputs["out_final_w"], outputs["out_final_h"]) == ("1800", "1350")
+    assert outputs["out_final_offset"] == "360, 0"
+
+
+def test_pad_shows_scaled_size_and_padding_offset():
+    outputs = calculate("pad", original_w=4000, original_h=3000, target_w=1080, target_h=1350)
+    assert (outputs["out_final_w"], outputs["out_final_h"]) == ("1080", "810")
+    assert outputs["out_final_offset"] == "0, 270"
+
+
+class StubMaster:
+
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, callback, *args):
+        self.pending.append((callback, args))
+
+    def run_pending(self):
+        pending, self.pending = self.pending, []
+        for callback, args in pending:
+            callback(*args)
+
+
+def test_switching_watch_folder_keeps_one_poll_loop(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+    master = StubMaster()
+    image_path = StubEntry(str(first))
+    logic = GuiLogic(master, {"image_path": image_path}, {}, {}, {}, {}, StubVar(False),
+                     watch_folder_var=StubVar(True))
+    try:
+        logic.update_folder_watch()
+        image_path.value = str(second)
+        logic.update_folder_watch()
+        master.run_pending()
+        assert len(master.pending) == 1
+    finally:
+        logic.stop_folder_watch()
+    master.run_pending()
+    assert master.pending == []
+
+
+def test_calculation_does_not_load_languages():
+    import localization_manager
+
+    calculate(original_w=1920, original_h=1080)
+    assert localization_manager._i18n is None
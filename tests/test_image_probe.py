@@ -0,0 +1,138 @@
+import io
+import struct
+import zlib
+
+import pytest
+
+from image_probe import ImageInfo, probe_image_info, probe_stream
+
+
+def png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+
+def png(width: int, height: int, *chunks: bytes) -> bytes:
+    ihdr = png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+    return b'\x89PNG\r\n\x1a\n' + ihdr + b''.join(chunks) + png_chunk(b'IDAT', b'') + png_chunk(b'IEND', b'')
+
+
+def jpeg_segment(marker: int, data: bytes) -> bytes:
+    return struct.pack('>BBH', 0xFF, marker, len(data) + 2) + data
+
+
+def jpeg(width: int, height: int, *segments: bytes) -> bytes:
+    sof = jpeg_segment(0xC0, struct.pack('>BHHB', 8, height, width, 3) + bytes(9))
+    return b'\xff\xd8' + b''.join(segments) + sof + b'\xff\xd9'
+
+
+def webp(chunk: bytes, payload: bytes) -> bytes:
+    body = b'WEBP' + chunk + struct.pack('<I', len(payload)) + payload
+    return b'RIFF' + struct.pack('<I', len(body)) + body
+
+
+def probe(data: bytes) -> ImageInfo:
+    return probe_image_info(io.BytesIO(data))
+
+
+def test_png():
+    assert probe(png(640, 480)) == ImageInfo(640, 480)
+
+
+def test_gif():
+    assert probe(b'GIF89a' + struct.pack('<HH', 320, 200) + bytes(22)) == ImageInfo(320, 200)
+
+
+def test_bmp_negative_height_is_top_down():
+    header = b'BM' + bytes(12) + struct.pack('<Iii', 40, 800, -600)
+    assert probe(header + bytes(8)) == ImageInfo(800, 600)
+
+
+def test_webp_lossy():
+    payload = bytes(3) + b'\x9d\x01\x2a' + struct.pack('<HH', 1024, 768)
+    assert probe(webp(b'VP8 ', payload)) == ImageInfo(1024, 768)
+
+
+def test_webp_lossless():
+    bits = (1000 - 1) | ((500 - 1) << 14)
+    assert probe(webp(b'VP8L', b'\x2f' + struct.pack('<I', bits) + bytes(8))) == ImageInfo(1000, 500)
+
+
+def test_webp_extended():
+    payload = bytes(4) + (4000 - 1).to_bytes(3, 'little') + (3000 - 1).to_bytes(3, 'little')
+    assert probe(webp(b'VP8X', payload)) == ImageInfo(4000, 3000)
+
+
+def test_jpeg_skips_segments_before_frame_header():
+    comment = jpeg_segment(0xFE, b'x' * 5000)
+    assert probe(jpeg(4032, 3024, comment)) == ImageInfo(4032, 3024)
+
+
+def test_jpeg_without_frame_header():
+    assert probe(b'\xff\xd8' + jpeg_segment(0xFE, b'x') + b'\xff\xd9') is None
+
+
+def test_unknown_format():
+    assert probe_stream(io.BytesIO(b'not an image' + bytes(32))) is None
+
+
+@pytest.mark.parametrize("image_format", ["PNG", "GIF", "BMP", "WEBP", "JPEG"])
+def test_matches_pillow(image_format):
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    Image.new("RGB", (123, 45)).save(buffer, image_format)
+    assert probe_stream(io.BytesIO(buffer.getvalue())) == (123, 45)
+
+
+def tiff(orientation: int = None, resolution: tuple = None, unit: int = 2, endian: str = '<') -> bytes:
+    entries = []
+    if orientation is not None:
+        entries.append((0x0112, 3, struct.pack(endian + 'H', orientation) + bytes(2)))
+    if resolution is not None:
+        data_offset = 8 + 2 + 12 * (len(entries) + 3) + 4
+        entries.append((0x011A, 5, struct.pack(endian + 'I', data_offset)))
+        entries.append((0x011B, 5, struct.pack(endian + 'I', data_offset + 8)))
+        entries.append((0x0128, 3, struct.pack(endian + 'H', unit) + bytes(2)))
+    ifd = struct.pack(endian + 'H', len(entries))
+    for tag, value_type, value in entries:
+        ifd += struct.pack(endian + 'HHI', tag, value_type, 1) + value
+    ifd += bytes(4)
+    data = b''
+    if resolution is not None:
+        data = struct.pack(endian + 'IIII', resolution[0], 1, resolution[1], 1)
+    byte_order = b'II' if endian == '<' else b'MM'
+    return byte_order + struct.pack(endian + 'HI', 42, 8) + ifd + data
+
+
+def test_jpeg_exif_orientation_swaps_size():
+    exif = jpeg_segment(0xE1, b'Exif\x00\x00' + tiff(orientation=6, endian='>'))
+    assert probe(jpeg(4032, 3024, exif)) == ImageInfo(3024, 4032, 6)
+
+
+def test_jpeg_exif_resolution_wins_over_jfif_density():
+    jfif = jpeg_segment(0xE0, b'JFIF\x00\x01\x01\x01' + struct.pack('>HH', 72, 72) + bytes(2))
+    exif = jpeg_segment(0xE1, b'Exif\x00\x00' + tiff(orientation=8, resolution=(300, 150)))
+    assert probe(jpeg(800, 600, jfif, exif)) == ImageInfo(600, 800, 8, (150.0, 300.0))
+
+
+def test_jpeg_jfif_density_in_dots_per_centimetre():
+    jfif = jpeg_segment(0xE0, b'JFIF\x00\x01\x01\x02' + struct.pack('>HH', 100, 100) + bytes(2))
+    info = probe(jpeg(800, 600, jfif))
+    assert info.dpi == pytest.approx((254.0, 254.0))
+
+
+def test_png_physical_size_and_exif_chunk():
+    phys = png_chunk(b'pHYs', struct.pack('>IIB', 11811, 11811, 1))
+    exif = png_chunk(b'eXIf', tiff(orientation=5))
+    info = probe(png(640, 480, phys, exif))
+    assert (info.width, info.height, info.orientation) == (480, 640, 5)
+    assert info.dpi == pytest.approx((300.0, 300.0), abs=0.01)
+
+
+def test_png_physical_size_without_unit_is_ignored():
+    phys = png_chunk(b'pHYs', struct.pack('>IIB', 1, 2, 0))
+    assert probe(png(640, 480, phys)) == ImageInfo(640, 480)
+
+
+def test_invalid_orientation_is_ignored():
+    exif = jpeg_segment(0xE1, b'Exif\x00\x00' + tiff(orientation=42))
+    assert probe(jpeg(800, 600, exif)) == ImageInfo(800, 600)
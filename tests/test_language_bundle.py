@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from language_bundle import LanguageBundle
+
+
+def write_language(folder, code: str, strings: dict, mtime_ns: int = None):
+    path = folder / f"{code}.json"
+    path.write_text(json.dumps(strings, ensure_ascii=False), encoding='utf-8')
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def lang_folder(tmp_path):
+    folder = tmp_path / "language"
+    folder.mkdir()
+    write_language(folder, "en", {"language_name": "English", "title": "Title", "ok": "OK"}, 1_000_000_000)
+    write_language(folder, "ja", {"language_name": "日本語", "title": "タイトル", "ok": ""}, 1_000_000_000)
+    return folder
+
+
+def load(lang_folder, tmp_path, default_code: str = "en") -> LanguageBundle:
+    return LanguageBundle.load(str(lang_folder), str(tmp_path / "bundle.pickle"), default_code)
+
+
+def is_cached(bundle: LanguageBundle) -> bool:
+    return not bundle.tables
+
+
+def test_merges_fallback_strings(lang_folder, tmp_path):
+    bundle = load(lang_folder, tmp_path)
+    assert bundle.names == {"en": "English", "ja": "日本語"}
+    table = bundle.load_table("ja")
+    assert (table["title"], table["ok"], table["missing"]) == ("タイトル", "OK", "<missing>")
+
+
+def test_second_load_reads_the_bundle(lang_folder, tmp_path):
+    assert not is_cached(load(lang_folder, tmp_path))
+    bundle = load(lang_folder, tmp_path)
+    assert is_cached(bundle)
+    assert bundle.load_table("ja")["title"] == "タイトル"
+
+
+def test_edited_file_is_recompiled(lang_folder, tmp_path):
+    load(lang_folder, tmp_path)
+    write_language(lang_folder, "ja", {"language_name": "日本語", "title": "題名", "ok": ""}, 1_000_000_000)
+    bundle = load(lang_folder, tmp_path)
+    assert not is_cached(bundle)
+    assert bundle.load_table("ja")["title"] == "題名"
+
+
+def test_same_size_edit_is_detected_by_mtime(lang_folder, tmp_path):
+    load(lang_folder, tmp_path)
+    write_language(lang_folder, "en", {"language_name": "English", "title": "Names", "ok": "OK"}, 2_000_000_000)
+    assert load(lang_folder, tmp_path).load_table("en")["title"] == "Names"
+
+
+def test_added_language_is_picked_up(lang_folder, tmp_path):
+    load(lang_folder, tmp_path)
+    write_language(lang_folder, "de", {"language_name": "Deutsch"})
+    bundle = load(lang_folder, tmp_path)
+    assert bundle.codes == {"en", "ja", "de"}
+    assert bundle.load_table("de")["title"] == "Title"
+
+
+def test_default_code_is_part_of_the_signature(lang_folder, tmp_path):
+    load(lang_folder, tmp_path)
+    bundle = load(lang_folder, tmp_path, default_code="ja")
+    assert not is_cached(bundle)
+    assert bundle.load_table("en")["ok"] == "OK"
+
+
+def test_corrupt_bundle_is_rebuilt(lang_folder, tmp_path):
+    (tmp_path / "bundle.pickle").write_bytes(b"garbage")
+    bundle = load(lang_folder, tmp_path)
+    assert bundle.load_table("en")["title"] == "Title"
+    assert is_cached(load(lang_folder, tmp_path))
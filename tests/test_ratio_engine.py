@@ -0,0 +1,102 @@
+import math
+from fractions import Fraction
+
+import pytest
+
+from ratio_engine import (best_approximations, closest_resolution, count_resolutions, describe_ratio, exact_ratio,
+                          iter_resolutions, nearest_standard_ratio)
+
+
+def brute_force_approximations(value: Fraction, max_denominator: int) -> list[tuple[int, int]]:
+    result = []
+    best_error = None
+    for q in range(1, max_denominator + 1):
+        p = max(1, round(value * q))
+        error = abs(Fraction(p, q) - value)
+        if best_error is None or error < best_error:
+            result.append((p, q))
+            best_error = error
+    return result
+
+
+def test_exact_ratio():
+    assert exact_ratio(1920, 1080) == (16, 9)
+    assert exact_ratio(1920.0, 1080.0) == (16, 9)
+    assert exact_ratio(0.1, 0.3) == (1, 3)
+    assert exact_ratio(0, 1080) is None
+
+
+def test_semiconvergents_of_pi():
+    assert best_approximations(math.pi, 1, 120) == [
+        (3, 1), (13, 4), (16, 5), (19, 6), (22, 7), (179, 57), (201, 64), (223, 71),
+        (245, 78), (267, 85), (289, 92), (311, 99), (333, 106), (355, 113),
+    ]
+
+
+@pytest.mark.parametrize("width, height", [(1366, 768), (2.39, 1), (1080, 1350), (4000, 2251), (3, 7)])
+def test_best_approximations_match_brute_force(width, height):
+    value = Fraction(*exact_ratio(width, height))
+    assert best_approximations(width, height, 64) == brute_force_approximations(value, 64)
+
+
+def test_nearest_standard_ratio():
+    match = nearest_standard_ratio(1366, 768)
+    assert (match.label, match.width, match.height) == ("16:9", 16, 9)
+    assert match.error == pytest.approx(1366 / 768 / (16 / 9) - 1)
+    assert nearest_standard_ratio(1080, 1350).label == "4:5"
+    assert nearest_standard_ratio(1300, 1000) is None
+    assert nearest_standard_ratio(1300, 1000, tolerance=0.05).label == "4:3"
+
+
+def test_describe_ratio_names_only_inexact_matches():
+    assert describe_ratio(1920, 1080) == "16:9"
+    assert describe_ratio(1366, 768) == "683:384 (≈16:9)"
+    assert describe_ratio(None, 1080) == "N/A"
+
+
+def brute_force_resolutions(ratio_w: int, ratio_h: int, alignment: int, max_width: int, **bounds) -> list:
+    result = []
+    for width in range(1, max_width + 1):
+        if width * ratio_h % ratio_w:
+            continue
+        height = width * ratio_h // ratio_w
+        if width % alignment or height % alignment:
+            continue
+        pixels = width * height / 1_000_000
+        if pixels < bounds.get("min_megapixels", 0) or pixels > bounds.get("max_megapixels", math.inf):
+            continue
+        result.append((width, height))
+    return result
+
+
+@pytest.mark.parametrize("ratio_w, ratio_h, alignment, bounds", [
+    (16, 9, 16, {}),
+    (4, 3, 1, {"min_megapixels": 2, "max_megapixels": 2.1}),
+    (21, 9, 8, {"min_megapixels": 1}),
+    (3, 2, 64, {}),
+])
+def test_iter_resolutions_matches_brute_force(ratio_w, ratio_h, alignment, bounds):
+    expected = brute_force_resolutions(ratio_w, ratio_h, alignment, 4000, **bounds)
+    found = list(iter_resolutions(ratio_w, ratio_h, alignment, max_width=4000, **bounds))
+    assert found == expected
+    assert list(iter_resolutions(ratio_w, ratio_h, alignment, max_width=4000, descending=True, **bounds)) == expected[::-1]
+    assert count_resolutions(ratio_w, ratio_h, alignment, max_width=4000, **bounds) == len(expected)
+
+
+def test_iter_resolutions_is_lazy_without_upper_bound():
+    resolutions = iter_resolutions(16, 9, alignment=8)
+    assert [next(resolutions) for _ in range(3)] == [(128, 72), (256, 144), (384, 216)]
+    with pytest.raises(ValueError):
+        next(iter_resolutions(16, 9, descending=True))
+
+
+def test_iter_resolutions_rejects_invalid_ratio():
+    assert list(iter_resolutions(0, 9, max_width=100)) == []
+    assert count_resolutions(16, 9, alignment=0, max_width=100) == 0
+
+
+def test_closest_resolution():
+    assert closest_resolution(16, 9, anchor_width=1000) == (992, 558)
+    assert closest_resolution(16, 9, anchor_width=1000, alignment=8) == (1024, 576)
+    assert closest_resolution(16, 9, anchor_height=1000, alignment=8, max_width=1600) == (1536, 864)
+    assert closest_resolution(16, 9, anchor_width=1000, max_width=10) is None
@@ -0,0 +1,106 @@
+import pytest
+
+from ratio_index import RatioEntry, RatioGroup, RatioIndex
+
+IMAGES = [
+    ("portrait.jpg", 1080, 1350),
+    ("wide.png", 3840, 2160),
+    ("写真.jpg", 1920, 1080),
+    ("square.gif", 500, 500),
+    ("laptop.png", 1366, 768),
+]
+
+
+def build() -> RatioIndex:
+    index = RatioIndex()
+    assert index.add_results(IMAGES + [("broken.jpg", None, None), ("empty.png", 0, 10)]) == len(IMAGES)
+    return index
+
+
+def test_rows_are_sorted_by_ratio():
+    index = build()
+    ratios = [index.entry(row).ratio for row in range(len(index))]
+    assert ratios == sorted(ratios)
+    assert index.entry(0) == RatioEntry("portrait.jpg", 1080, 1350, 4, 5, 0.8)
+
+
+def test_queries():
+    index = build()
+    assert sorted(entry.path for entry in index.entries(index.exact(16, 9))) == ["wide.png", "写真.jpg"]
+    assert len(index.near(16, 9, tolerance=0.01)) == 3
+    assert index.groups(min_count=2) == [RatioGroup(16, 9, index.exact(16, 9))]
+    edges, counts = index.histogram(bins=4)
+    assert counts.sum() == len(IMAGES)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = build()
+    path = index.save(str(tmp_path / "index.bin"))
+    with RatioIndex.load(path) as loaded:
+        assert len(loaded) == len(index)
+        assert loaded.entries(range(len(loaded))) == index.entries(range(len(index)))
+        assert loaded.groups() == index.groups()
+
+
+def test_append_after_load(tmp_path):
+    path = build().save(str(tmp_path / "index.bin"))
+    with RatioIndex.load(path) as loaded:
+        loaded.add("tall.jpg", 1080, 1920)
+        loaded.save(path)
+    with RatioIndex.load(path) as reloaded:
+        assert len(reloaded) == len(IMAGES) + 1
+        assert reloaded.entry(0).path == "tall.jpg"
+
+
+def test_empty_index_round_trip(tmp_path):
+    path = RatioIndex().save(str(tmp_path / "index.bin"))
+    with RatioIndex.load(path) as loaded:
+        assert len(loaded) == 0
+        assert loaded.groups() == []
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "index.bin"
+    path.write_bytes(b"not an index at all, just some bytes")
+    with pytest.raises(ValueError):
+        RatioIndex.load(str(path))
+
+
+@pytest.mark.parametrize("cut", [1, 8, 40, 100])
+def test_rejects_truncated_files(tmp_path, cut):
+    path = tmp_path / "index.bin"
+    build().save(str(path))
+    path.write_bytes(path.read_bytes()[:-cut])
+    with pytest.raises(ValueError):
+        RatioIndex.load(str(path))
+
+
+def test_rejects_corrupt_blob_length(tmp_path):
+    path = tmp_path / "index.bin"
+    build().save(str(path))
+    data = bytearray(path.read_bytes())
+    data[16:24] = (3).to_bytes(8, 'little')
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        RatioIndex.load(str(path))
+
+
+def test_failed_load_closes_the_mapping(tmp_path, monkeypatch):
+    import mmap
+
+    import ratio_index
+
+    opened = []
+    original_mmap = mmap.mmap
+
+    def tracking_mmap(*args, **kwargs):
+        opened.append(original_mmap(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(ratio_index.mmap, "mmap", tracking_mmap)
+    path = tmp_path / "index.bin"
+    build().save(str(path))
+    path.write_bytes(path.read_bytes()[:-100])
+    with pytest.raises(ValueError):
+        RatioIndex.load(str(path))
+    assert opened and opened[0].closed
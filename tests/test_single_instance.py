@@ -0,0 +1,33 @@
+import os
+import stat
+import threading
+
+import single_instance
+from single_instance import InstanceServer, forward_to_running_instance
+
+
+def test_instance_file_does_not_depend_on_working_directory():
+    assert os.path.isabs(single_instance.INSTANCE_FILE)
+
+
+def test_forward_reaches_running_instance(tmp_path):
+    instance_file = str(tmp_path / "user" / "instance.json")
+    received = []
+    done = threading.Event()
+    server = InstanceServer(lambda paths: (received.extend(paths), done.set()), instance_file)
+    assert server.start()
+    try:
+        assert stat.S_IMODE(os.stat(instance_file).st_mode) == 0o600
+        assert forward_to_running_instance(["photo.jpg"], instance_file)
+        assert done.wait(1)
+    finally:
+        server.close()
+    assert received == [os.path.abspath("photo.jpg")]
+    assert not os.path.exists(instance_file)
+
+
+def test_settings_file_does_not_depend_on_working_directory():
+    from settings_manager import SETTINGS_FILE
+
+    assert os.path.isabs(SETTINGS_FILE)
+    assert os.path.dirname(SETTINGS_FILE) == os.path.dirname(single_instance.INSTANCE_FILE)
@@ -0,0 +1,71 @@
+import itertools
+
+import pytest
+
+from target_solver import MODE_CONTAIN, MODE_COVER, MODE_PAD, SOLVER_MODES, solve_target, solve_target_batch
+
+
+def test_cover_crops_the_overflowing_side():
+    solution = solve_target(4000, 3000, 1080, 1350, MODE_COVER)
+    assert (solution.width, solution.height) == (1800, 1350)
+    assert (solution.canvas_width, solution.canvas_height) == (1080, 1350)
+    assert (solution.offset_x, solution.offset_y) == (360, 0)
+
+
+def test_pad_centres_the_image_in_the_box():
+    solution = solve_target(4000, 3000, 1080, 1350, MODE_PAD)
+    assert (solution.width, solution.height) == (1080, 810)
+    assert (solution.canvas_width, solution.canvas_height) == (1080, 1350)
+    assert (solution.offset_x, solution.offset_y) == (0, 270)
+
+
+def test_contain_shrinks_the_canvas_to_the_image():
+    solution = solve_target(4000, 3000, 1080, 1350, MODE_CONTAIN)
+    assert (solution.width, solution.height, solution.canvas_width, solution.canvas_height) == (1080, 810, 1080, 810)
+
+
+def test_single_side_keeps_source_ratio():
+    assert solve_target(1920, 1080, box_w=1280)[:2] == pytest.approx((1280, 720))
+    assert solve_target(1920, 1080, box_h=720)[:2] == pytest.approx((1280, 720))
+
+
+@pytest.mark.parametrize("mode, alignment", list(itertools.product(SOLVER_MODES, (1, 8, 16, 64))))
+def test_alignment_keeps_sizes_on_the_grid(mode, alignment):
+    solution = solve_target(4000, 3000, 1080, 1350, mode, integer=True, alignment=alignment)
+    for value in (solution.width, solution.height, solution.canvas_width, solution.canvas_height):
+        assert isinstance(value, int) and value % alignment == 0
+    if mode == MODE_COVER:
+        assert solution.width >= solution.canvas_width and solution.height >= solution.canvas_height
+    else:
+        assert solution.width <= solution.canvas_width and solution.height <= solution.canvas_height
+    assert solution.offset_x == abs(solution.width - solution.canvas_width) // 2
+    assert solution.offset_y == abs(solution.height - solution.canvas_height) // 2
+
+
+@pytest.mark.parametrize("mode", SOLVER_MODES)
+def test_max_megapixels_limits_the_canvas(mode):
+    solution = solve_target(6000, 4000, 6000, 4000, mode, max_megapixels=12)
+    assert solution.canvas_width * solution.canvas_height == pytest.approx(12_000_000)
+    assert solution.canvas_width / solution.canvas_height == pytest.approx(1.5)
+
+
+def test_max_width_limits_the_canvas():
+    solution = solve_target(6000, 4000, 8000, None, MODE_COVER, max_w=3000)
+    assert solution[:4] == pytest.approx((3000, 2000, 3000, 2000))
+
+
+def test_invalid_input():
+    assert solve_target(0, 1080, 100, 100) is None
+    assert solve_target(1920, 1080, 100, 100, "stretch") is None
+
+
+def test_batch_matches_scalar():
+    numpy = pytest.importorskip("numpy")
+    cases = [(4000, 3000, 1080, 1350), (1920, 1080, 1280, None), (3000, 4000, None, 1000), (640, 480, 1920, 1080)]
+    for mode, integer, alignment in itertools.product(SOLVER_MODES, (False, True), (1, 16)):
+        columns = [numpy.array([case[i] if case[i] is not None else numpy.nan for case in cases], dtype=float)
+                   for i in range(4)]
+        batch = solve_target_batch(*columns, mode=mode, max_megapixels=1.5, integer=integer, alignment=alignment)
+        for row, case in enumerate(cases):
+            expected = solve_target(*case, mode=mode, max_megapixels=1.5, integer=integer, alignment=alignment)
+            assert [values[row] for values in batch] == pytest.approx(list(expected))
@@ -0,0 +1,110 @@
+import io
+import struct
+
+from video_probe import VideoSize, probe_video
+
+ROTATE_90 = (0, 0x10000, 0, -0x10000, 0, 0, 0, 0, 0x40000000)
+IDENTITY = (0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+
+
+def box(box_type: bytes, *children: bytes) -> bytes:
+    payload = b''.join(children)
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+def large_box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack('>I4sQ', 1, box_type, 16 + len(payload)) + payload
+
+
+def tkhd(width: int, height: int, matrix=IDENTITY) -> bytes:
+    payload = bytes(4) + bytes(20) + bytes(16) + struct.pack('>9i', *matrix) + struct.pack('>II', width << 16, height << 16)
+    return box(b'tkhd', payload)
+
+
+def hdlr(component: bytes, handler: bytes) -> bytes:
+    return box(b'hdlr', bytes(4) + component + handler + bytes(12) + b'\0')
+
+
+def stsd(width: int, height: int, pasp=None) -> bytes:
+    entry = bytes(24) + struct.pack('>HH', width, height) + bytes(50)
+    children = [entry]
+    if pasp is not None:
+        children.append(box(b'pasp', struct.pack('>II', *pasp)))
+    return box(b'stsd', bytes(4) + struct.pack('>I', 1), box(b'avc1', *children))
+
+
+def mp4(width: int = 1920, height: int = 1080, matrix=IDENTITY, pasp=None, data_handler: bool = False,
+        mdat: bytes = b'') -> bytes:
+    minf_children = []
+    if data_handler:
+        minf_children.append(hdlr(b'dhlr', b'alis'))
+    minf_children.append(box(b'stbl', stsd(width, height, pasp)))
+    trak = box(b'trak', tkhd(width, height, matrix),
+               box(b'mdia', hdlr(b'mhlr', b'vide'), box(b'minf', *minf_children)))
+    return box(b'ftyp', b'qt  ' + bytes(4)) + mdat + box(b'moov', trak)
+
+
+def probe(data: bytes) -> VideoSize:
+    return probe_video(io.BytesIO(data))
+
+
+def test_bmff_dimensions():
+    assert probe(mp4()) == VideoSize(1920, 1080, 1920, 1080)
+
+
+def test_bmff_rotation_swaps_display_size():
+    assert probe(mp4(matrix=ROTATE_90)) == VideoSize(1920, 1080, 1080, 1920)
+
+
+def test_bmff_pixel_aspect_ratio():
+    assert probe(mp4(1440, 1080, pasp=(4, 3))) == VideoSize(1440, 1080, 1920, 1080)
+
+
+def test_quicktime_data_handler_in_minf():
+    assert probe(mp4(data_handler=True)) == VideoSize(1920, 1080, 1920, 1080)
+
+
+def test_moov_after_largesize_mdat():
+    data = mp4(1280, 720, mdat=large_box(b'mdat', bytes(4096)))
+    assert probe(data) == VideoSize(1280, 720, 1280, 720)
+
+
+def test_bmff_without_video_track():
+    trak = box(b'trak', tkhd(0, 0), box(b'mdia', hdlr(b'mhlr', b'soun')))
+    assert probe(box(b'ftyp', b'isom' + bytes(4)) + box(b'moov', trak)) is None
+
+
+def element(element_id: int, payload: bytes, unknown_size: bool = False) -> bytes:
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, 'big')
+    size = b'\x01\xff\xff\xff\xff\xff\xff\xff' if unknown_size else (0x10000000 | len(payload)).to_bytes(4, 'big')
+    return id_bytes + size + payload
+
+
+def uint(element_id: int, value: int) -> bytes:
+    return element(element_id, value.to_bytes(4, 'big'))
+
+
+def matroska(video_fields: bytes, unknown_size: bool = True) -> bytes:
+    header = element(0x1A45DFA3, element(0x4282, b'webm'))
+    audio = element(0xAE, uint(0x83, 2))
+    video = element(0xAE, uint(0x83, 1) + element(0xE0, video_fields))
+    info = element(0x1549A966, uint(0x2AD7B1, 1000000))
+    tracks = element(0x1654AE6B, audio + video)
+    cluster = element(0x1F43B675, bytes(64))
+    return header + element(0x18538067, info + tracks + cluster, unknown_size=unknown_size)
+
+
+def test_matroska_unknown_size_segment():
+    data = matroska(uint(0xB0, 1920) + uint(0xBA, 1080))
+    assert probe(data) == VideoSize(1920, 1080, 1920, 1080)
+
+
+def test_matroska_display_size_and_aspect_unit():
+    data = matroska(uint(0xB0, 720) + uint(0xBA, 576) + uint(0x54B0, 16) + uint(0x54BA, 9) + uint(0x54B2, 3),
+                    unknown_size=False)
+    assert probe(data) == VideoSize(720, 576, 1024, 576)
+
+
+def test_matroska_crop():
+    data = matroska(uint(0xB0, 1920) + uint(0xBA, 1088) + uint(0x54AA, 8))
+    assert probe(data) == VideoSize(1920, 1088, 1920, 1080)